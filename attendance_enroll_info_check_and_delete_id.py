@@ -2,28 +2,48 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
-import json
+from datetime import datetime
 import csv
-import os
-import shutil
 from project.utils import Conf
-from sklearn.preprocessing import LabelEncoder
-from sklearn.svm import SVC
-import pickle
-
-# File paths
-json_file_path_attendance = 'attendance.json'
-json_file_path_enroll = 'database/enroll.json'
-dataset_path = "dataset/PROJECT"
+from project.attendance import open_attendance_log
+from project.storage import open_students
+from project.maintenance import delete_person as delete_person_data
+from project.jobs import JobRunner
 
 # Load the configuration
 conf = Conf("config/config.json")
-encodings_path = conf["encodings_path"]
-recognizer_path = conf["recognizer_path"]
-le_path = conf["le_path"]
+attendance_log = open_attendance_log(conf)
+students = open_students(conf)
+
+# Maintenance jobs (delete and retrain) and CSV exports run off the Tk thread
+jobs = JobRunner()
+
+# Number of rows fetched from storage per page
+PAGE_SIZE = 200
+
+# Stream rows from storage straight into a CSV file, only one row is held in memory
+def write_csv(file_path, headers, rows, progress):
+    count = 0
+    with open(file_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)  # Write headers
+        for row in rows:
+            writer.writerow(row)  # Write data rows
+            count += 1
+            if count % 1000 == 0:
+                progress(f"{count} rows written")
+    return count
 
 # Function to save data as CSV
-def save_as_csv(data, headers, filename_suggestion):
+def save_as_csv(root, status_label, make_rows, headers, filename_suggestion):
+    # Build the query on the Tk thread (it reads the filter fields), the rows are only
+    # fetched while the file is written
+    try:
+        rows = make_rows()
+    except ValueError:
+        messagebox.showerror("Error", "Dates must be given as YYYY-MM-DD.")
+        return
+
     file_path = filedialog.asksaveasfilename(
         defaultextension=".csv",
         filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
@@ -32,33 +52,97 @@ def save_as_csv(data, headers, filename_suggestion):
     if not file_path:
         return  # If the user cancels the save dialog
 
-    # Write data to CSV
-    try:
-        with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)  # Write headers
-            for row in data:
-                writer.writerow(row)  # Write data rows
-        messagebox.showinfo("Success", f"Data saved as {file_path}")
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to save CSV: {e}")
+    # Write data to CSV in the background
+    job = jobs.submit("export", lambda progress: write_csv(file_path, headers, rows, progress))
 
-# Function to load and display attendance and enrollment records
-def display_records():
-    # Load attendance data
-    try:
-        with open(json_file_path_attendance, 'r') as file:
-            attendance_data = json.load(file)
-    except FileNotFoundError:
-        attendance_data = {"attendance": {}}
+    def poll_export():
+        status_label.config(text=f"Exporting: {job.message}")
+        if not job.done():
+            root.after(200, poll_export)
+            return
 
-    # Load enrollment data
-    try:
-        with open(json_file_path_enroll, 'r') as file:
-            enroll_data = json.load(file)
-    except FileNotFoundError:
-        enroll_data = {"student": {}}
+        status_label.config(text="")
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to save CSV: {job.error}")
+        else:
+            messagebox.showinfo("Success", f"{job.result} rows saved as {file_path}")
+
+    poll_export()
 
+# Build a Treeview that fetches its rows page by page as the user scrolls
+def create_paged_tree(parent, columns, widths, fetch_page, row_key):
+    frame = ttk.Frame(parent)
+    frame.pack(fill=tk.BOTH, expand=True, pady=10)
+
+    tree = ttk.Treeview(frame, columns=columns, show="headings")
+    for (column, width) in zip(columns, widths):
+        tree.heading(column, text=column)
+        tree.column(column, width=width, anchor="center")
+
+    state = {"after": None, "more": True, "pending": False}
+
+    def load_page():
+        state["pending"] = False
+        if not state["more"]:
+            return
+
+        # Fetch one page after the key of the last row shown
+        rows = list(fetch_page(state["after"], PAGE_SIZE))
+        state["more"] = len(rows) == PAGE_SIZE
+        if len(rows) > 0:
+            state["after"] = row_key(rows[-1])
+
+        for row in rows:
+            if "unknown" not in row[:2]:  # Only show valid data
+                tree.insert("", "end", values=tuple(row))
+
+    def reload():
+        # Clear the rows and start again from the first page
+        tree.delete(*tree.get_children())
+        state["after"] = None
+        state["more"] = True
+        load_page()
+
+    # Load the next page once the view gets close to the last loaded row
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        if float(last) > 0.9 and state["more"] and not state["pending"]:
+            state["pending"] = True
+            tree.after_idle(load_page)
+
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+    tree.configure(yscrollcommand=on_scroll)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    reload()
+    return reload
+
+# Add a labelled entry (or combobox) to a filter bar
+def add_filter(parent, label, values=None):
+    tk.Label(parent, text=label).pack(side=tk.LEFT, padx=(10, 2))
+    if values is not None:
+        widget = ttk.Combobox(parent, values=values, width=10, state="readonly")
+        widget.set(values[0])
+    else:
+        widget = tk.Entry(parent, width=12)
+    widget.pack(side=tk.LEFT)
+    return widget
+
+# Read a filter value, empty fields and "All" mean no filter
+def filter_value(widget):
+    value = widget.get().strip()
+    return value if value and value != "All" else None
+
+# Read a YYYY-MM-DD date filter
+def date_value(widget):
+    value = filter_value(widget)
+    if value is not None:
+        datetime.strptime(value, "%Y-%m-%d")
+    return value
+
+# Function to load and display attendance and enrollment records
+def display_records():
     # Create a Tkinter window
     root = tk.Tk()
     root.title("Attendance and Enrollment Records")
@@ -69,32 +153,46 @@ def display_records():
     notebook = ttk.Notebook(root)
     notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
+    classes = ["All"] + list(students.classes())
+
     # Attendance Tab
     attendance_frame = ttk.Frame(notebook)
     notebook.add(attendance_frame, text="Attendance", padding=10)
 
-    tree_attendance = ttk.Treeview(attendance_frame, columns=("ID", "Name", "Date-Time"), show="headings")
-    tree_attendance.heading("ID", text="ID")
-    tree_attendance.heading("Name", text="Name")
-    tree_attendance.heading("Date-Time", text="Date-Time")
-    tree_attendance.column("ID", width=100, anchor="center")
-    tree_attendance.column("Name", width=200, anchor="center")
-    tree_attendance.column("Date-Time", width=300, anchor="center")
-    tree_attendance.pack(fill=tk.BOTH, expand=True, pady=10)
-
-    # Populate Attendance Data
-    attendance_rows = []
-    for id, record in attendance_data.get("attendance", {}).items():
-        name = record.get("name", "unknown")
-        date_time = record.get("date_time", "unknown")
-        if id != "unknown" and name != "unknown" and date_time != "unknown":
-            attendance_rows.append((id, name, date_time))
-            tree_attendance.insert("", "end", values=(id, name, date_time))
-
-    # Button to download attendance as CSV
+    # Attendance filters, they run as indexed queries against the storage
+    attendance_filters = tk.Frame(attendance_frame)
+    attendance_filters.pack(fill=tk.X)
+    start_entry = add_filter(attendance_filters, "From (YYYY-MM-DD):")
+    end_entry = add_filter(attendance_filters, "To:")
+    attendance_class = add_filter(attendance_filters, "Class:", classes)
+    attendance_person = add_filter(attendance_filters, "Person (ID or name):")
+
+    def attendance_query(after=None, limit=None):
+        return attendance_log.query(start=date_value(start_entry), end=date_value(end_entry),
+                                    person=filter_value(attendance_person),
+                                    cls=filter_value(attendance_class), after=after, limit=limit)
+
+    reload_attendance = create_paged_tree(
+        attendance_frame, ("ID", "Name", "Date-Time"), (100, 200, 300),
+        attendance_query, lambda event: (event.date_time, event.id))
+
+    def apply_attendance_filters():
+        try:
+            reload_attendance()
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be given as YYYY-MM-DD.")
+
+    tk.Button(attendance_filters, text="Apply", command=apply_attendance_filters).pack(side=tk.LEFT, padx=10)
+
+    attendance_status = tk.Label(attendance_frame, text="")
+    attendance_status.pack()
+
+    # Button to download attendance as CSV, streamed from storage with the current filters
     download_attendance_btn = tk.Button(
-        attendance_frame, text="Download Attendance as CSV", 
-        command=lambda: save_as_csv(attendance_rows, ["ID", "Name", "Date-Time"], "attendance.csv")
+        attendance_frame, text="Download Attendance as CSV",
+        command=lambda: save_as_csv(root, attendance_status,
+                                    lambda: ((e.id, e.name, e.date_time) for e in attendance_query() if e.id != "unknown"),
+                                    ["ID", "Name", "Date-Time"], "attendance.csv")
     )
     download_attendance_btn.pack(pady=10)
 
@@ -102,55 +200,31 @@ def display_records():
     enrollment_frame = ttk.Frame(notebook)
     notebook.add(enrollment_frame, text="Enrolled Students", padding=10)
 
-    tree_enrollment = ttk.Treeview(enrollment_frame, columns=("ID", "Name", "Status"), show="headings")
-    tree_enrollment.heading("ID", text="ID")
-    tree_enrollment.heading("Name", text="Name")
-    tree_enrollment.heading("Status", text="Status")
-    tree_enrollment.column("ID", width=100, anchor="center")
-    tree_enrollment.column("Name", width=200, anchor="center")
-    tree_enrollment.column("Status", width=150, anchor="center")
-    tree_enrollment.pack(fill=tk.BOTH, expand=True, pady=10)
-
-     # Function to update the tables
-    def update_tables():
-        # Clear existing rows in both tables
-        for item in tree_attendance.get_children():
-            tree_attendance.delete(item)
-        for item in tree_enrollment.get_children():
-            tree_enrollment.delete(item)
-        
-        # Populate Attendance Data
-        attendance_rows = []
-        for id, record in attendance_data.get("attendance", {}).items():
-            name = record.get("name", "unknown")
-            date_time = record.get("date_time", "unknown")
-            if id != "unknown" and name != "unknown" and date_time != "unknown":
-                attendance_rows.append((id, name, date_time))
-                tree_attendance.insert("", "end", values=(id, name, date_time))
-
-        # # Populate Enrollment Data
-        # enrollment_rows = []
-        # for id, record in enroll_data.get("student", {}).items():
-        #     if "unknown" not in record:  # Only process valid data
-        #         for name, details in record.items():
-        #             status = details[1] if len(details) > 1 else "unknown"
-        #             if id != "unknown" and name != "unknown" and status != "unknown":
-        #                 enrollment_rows.append((id, name, status))
-        #                 tree_enrollment.insert("", "end", values=(name,details[0],details[1]))
-
-    enrollment_rows = []
-    for id, record in enroll_data.get("student", {}).items():
-        if "unknown" not in record:  # Only process valid data
-            for name, details in record.items():
-                status = details[1] if len(details) > 1 else "unknown"
-                if id != "unknown" and name != "unknown" and status != "unknown":
-                    enrollment_rows.append((id, name, status))
-                    tree_enrollment.insert("", "end", values=(name,details[0],details[1]))
+    # Enrollment filters
+    enrollment_filters = tk.Frame(enrollment_frame)
+    enrollment_filters.pack(fill=tk.X)
+    enrollment_class = add_filter(enrollment_filters, "Class:", classes)
+    enrollment_person = add_filter(enrollment_filters, "Person (ID or name):")
+
+    def enrollment_query(after=None, limit=None):
+        return students.page(cls=filter_value(enrollment_class), person=filter_value(enrollment_person),
+                             after=after, limit=limit)
+
+    reload_enrollment = create_paged_tree(
+        enrollment_frame, ("ID", "Name", "Status"), (100, 200, 150),
+        enrollment_query, lambda row: row[0])
+
+    tk.Button(enrollment_filters, text="Apply", command=reload_enrollment).pack(side=tk.LEFT, padx=10)
+
+    enrollment_status = tk.Label(enrollment_frame, text="")
+    enrollment_status.pack()
 
     # Button to download enrollment as CSV
     download_enrollment_btn = tk.Button(
-        enrollment_frame, text="Download Enrollment as CSV", 
-        command=lambda: save_as_csv(enrollment_rows, ["ID", "Name", "Status"], "enrollment.csv")
+        enrollment_frame, text="Download Enrollment as CSV",
+        command=lambda: save_as_csv(root, enrollment_status,
+                                    lambda: (row for row in enrollment_query() if "unknown" not in row),
+                                    ["ID", "Name", "Status"], "enrollment.csv")
     )
     download_enrollment_btn.pack(pady=10)
 
@@ -161,7 +235,7 @@ def display_records():
     # ID Entry Field for Deleting Person
     delete_label = tk.Label(delete_frame, text="Enter ID to Delete:")
     delete_label.pack(pady=10)
-    
+
     delete_entry = tk.Entry(delete_frame, font=("Arial", 14))
     delete_entry.pack(pady=10)
 
@@ -172,99 +246,37 @@ def display_records():
         if not person_id:
             messagebox.showerror("Error", "Please enter an ID to delete.")
             return
-        
-        # Load enrollment data
-        try:
-            with open(json_file_path_enroll, 'r') as file:
-                enroll_data = json.load(file)
-        except FileNotFoundError:
-            enroll_data = {"student": {}}
 
-        # load attendance data
-        try:
-            with open(json_file_path_attendance, 'r') as file:
-                attendance_data = json.load(file)
-
-        except FileNotFoundError:
-            attendance_data = {"attendance": {}}
-
-        # Iterate through the 'student' dictionary to find the matching ID
-        person_found = False
-        for id, record in enroll_data['student'].items():
-            # Check if the person_id matches a key in the nested dictionary (e.g., "03" for ID "4")
-            if person_id in record:
-                # If we find the person, delete the entry
-                del enroll_data['student'][id]
-                person_found = True
-                shutil.rmtree(f"{dataset_path}/{person_id}")
-                # Delete the attendance data for the specific student
-                if person_id in attendance_data["attendance"]:
-                    del attendance_data["attendance"][person_id]
-                    print(f"Attendance data for student {person_id} deleted.")
-                else:
-                    print(f"Student ID {person_id} not found.")
-
-                    # Load the face encodings
-                print("[INFO] loading face encodings...")
-                with open(encodings_path, "rb") as f:
-                    data = pickle.load(f)  # Use pickle.load instead of pickle.loads
-
-                # Check if person_id exists in the 'names' list
-                if person_id in data['names']:
-                    # Get all the indexes where person_id_to_delete occurs in 'names'
-                    indices_to_delete = [i for i, name in enumerate(data['names']) if name == person_id]
-                    
-                    # Delete the corresponding entries from 'names' and 'encodings'
-                    for index in reversed(indices_to_delete):  # We reverse to avoid index shifting during deletion
-                        del data['names'][index]
-                        del data['encodings'][index]
-                    
-                    print(f"[INFO] Deleted all occurrences of person ID {person_id}")
-                    
-                    # Save the updated encoding data back to the pickle file
-                    with open("output/encodings.pickle", "wb") as f:
-                        pickle.dump(data, f)
-                    
-                    print("[INFO] Updated encodings.pickle successfully.")
-                else:
-                    print(f"[ERROR] Person ID {person_id} not found in the encodings data.")
-
-                try:
-                    # Encode the labels
-                    print("[INFO] encoding labels...")
-                    le = LabelEncoder()
-                    labels = le.fit_transform(data["names"])
-
-                    # Train the model used to accept the 128-d encodings of the face
-                    print("[INFO] training model...")
-                    recognizer = SVC(C=1.0, kernel="linear", probability=True)
-
-                    # Train the model using all encodings at once
-                    recognizer.fit(data["encodings"], labels)
-
-                    # Write the model to disk
-                    print("[INFO] writing the model to disk...")
-                    with open(recognizer_path, "wb") as f:
-                        pickle.dump(recognizer, f)
-
-                    # Write the label encoder to disk
-                    with open(le_path, "wb") as f:
-                        pickle.dump(le, f)
-                except:
-                     messagebox.showinfo("Success", f"Only one person is enrolled so cannot train the algorithm")
-                break
-        if person_found:
-
-            # Save the updated data back to the JSON file
-            with open(json_file_path_enroll, 'w') as file:
-                json.dump(enroll_data, file, indent=4)
-
-            with open(json_file_path_attendance, 'w') as file:
-                json.dump(attendance_data, file, indent=4)
-            
+        # Remove the person from the students, dataset, attendance, encodings and model
+        # in the background, the window keeps responding while the model is updated
+        delete_button.config(state=tk.DISABLED)
+        job = jobs.submit("delete", delete_person_data, conf, person_id, log=attendance_log, students=students)
+        poll_delete(job, person_id)
+
+    # Poll the delete job and report the outcome once it finished
+    def poll_delete(job, person_id):
+        delete_status.config(text=f"Deleting {person_id}: {job.message}")
+        if not job.done():
+            root.after(200, poll_delete, job, person_id)
+            return
+
+        delete_button.config(state=tk.NORMAL)
+        result = job.result
+
+        if job.error is not None:
+            messagebox.showerror("Error", f"Failed to delete {person_id}: {job.error}")
+
+        elif result is not None:
+            if not result["trained"]:
+                messagebox.showinfo("Success", f"Only one person is enrolled so cannot train the algorithm")
+
             messagebox.showinfo("Success", f"Person with ID {person_id} deleted successfully.")
             delete_entry.delete(0, tk.END)  # Clear the input field
 
+            # Refresh the tables without the deleted person
+            apply_attendance_filters()
+            reload_enrollment()
+
         else:
             messagebox.showerror("Error", f"No person found with ID {person_id}.")
 
@@ -272,6 +284,10 @@ def display_records():
     delete_button = tk.Button(delete_frame, text="Delete Person", command=delete_person)
     delete_button.pack(pady=10)
 
+    # Delete job status
+    delete_status = tk.Label(delete_frame, text="")
+    delete_status.pack(pady=10)
+
     # Exit button
     exit_button = tk.Button(root, text="Exit", font=("Arial", 14, "bold"), bg="#ff3333", fg="white", command=root.quit)
     exit_button.pack(pady=20)
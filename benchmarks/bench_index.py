@@ -0,0 +1,73 @@
+# USAGE
+# python benchmarks/bench_index.py --sizes 1000,10000,100000
+
+# import the necessary packages
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project.recognition import EmbeddingIndex
+from benchmarks.synthetic import synthetic_gallery
+import numpy as np
+import argparse
+import time
+
+def time_queries(index, queries, nprobe=None):
+	# time every query on its own, the way the recognizer calls it
+	latencies = []
+	labels = []
+	for q in queries:
+		start = time.perf_counter()
+		(_, l) = index.search(q[None, :], k=1, nprobe=nprobe)
+		latencies.append(time.perf_counter() - start)
+		labels.append(l[0, 0])
+
+	return (np.array(latencies) * 1000.0, np.array(labels))
+
+# construct the argument parser and parse the arguments
+ap = argparse.ArgumentParser()
+ap.add_argument("-s", "--sizes", default="1000,10000",
+	help="comma separated gallery sizes (number of people)")
+ap.add_argument("-p", "--per-person", type=int, default=30,
+	help="encodings per person")
+ap.add_argument("-q", "--queries", type=int, default=200,
+	help="number of queries per gallery size")
+ap.add_argument("-n", "--nprobe", default="4,8,16",
+	help="comma separated IVF probe counts")
+ap.add_argument("-r", "--seed", type=int, default=42,
+	help="random seed")
+args = vars(ap.parse_args())
+
+rng = np.random.RandomState(args["seed"])
+probes = [int(n) for n in args["nprobe"].split(",")]
+
+print("{:>8} {:>9} {:<10} {:>10} {:>9} {:>9} {:>9}".format("people",
+	"rows", "index", "build(s)", "p50(ms)", "p99(ms)", "recall@1"))
+
+for people in [int(s) for s in args["sizes"].split(",")]:
+	# build the gallery and the queries (fresh noisy samples of enrolled
+	# people)
+	(centres, encodings, names) = synthetic_gallery(people,
+		args["per_person"], rng)
+	who = rng.randint(0, people, size=args["queries"])
+	queries = centres[who] + rng.randn(len(who), 128).astype(
+		"float32") * 0.03
+
+	# the exact index provides the ground truth for recall@1
+	start = time.perf_counter()
+	exact = EmbeddingIndex.build(encodings, names, kind="exact")
+	build = time.perf_counter() - start
+	(lat, truth) = time_queries(exact, queries)
+	print("{:>8} {:>9} {:<10} {:>10.2f} {:>9.3f} {:>9.3f} {:>9.3f}".format(
+		people, len(encodings), "exact", build, np.percentile(lat, 50),
+		np.percentile(lat, 99), 1.0))
+
+	start = time.perf_counter()
+	ivf = EmbeddingIndex.build(encodings, names, kind="ivf")
+	build = time.perf_counter() - start
+	for nprobe in probes:
+		(lat, labels) = time_queries(ivf, queries, nprobe=nprobe)
+		print("{:>8} {:>9} {:<10} {:>10.2f} {:>9.3f} {:>9.3f} {:>9.3f}".format(
+			people, len(encodings), "ivf/{}".format(nprobe), build,
+			np.percentile(lat, 50), np.percentile(lat, 99),
+			np.mean(labels == truth)))
@@ -0,0 +1,402 @@
+# USAGE
+# python benchmarks/bench_pipeline.py --output output/bench
+# python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json
+# python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json --update-baseline
+
+# import the necessary packages
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project.recognition import NearestNeighborRecognizer
+from project.recognition import PrototypeRecognizer
+from project.recognition import IndexRecognizer
+from project.recognition import EmbeddingIndex
+from project.recognition import SVCRecognizer
+from project.attendance import AttendanceLedger
+from project.attendance import AttendanceEvent
+from project.attendance import AttendanceLog
+from project.attendance import SQLiteAttendanceLog
+from project.storage import StudentIndex
+from project.storage import SQLiteDatabase
+from project.storage import SQLiteStudents
+from project.storage import migrate_students_json
+from benchmarks.synthetic import synthetic_gallery
+from imutils import paths
+from datetime import datetime
+import face_recognition
+import numpy as np
+import tempfile
+import platform
+import argparse
+import time
+import json
+import csv
+import cv2
+
+FIELDS = ["stage", "case", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+
+def summarize(stage, case, latencies):
+	# collapse the per-call latencies (in seconds) of one case into a row
+	ms = np.array(latencies) * 1000.0
+
+	return {"stage": stage, "case": case, "n": len(ms),
+		"mean_ms": round(float(ms.mean()), 4),
+		"p50_ms": round(float(np.percentile(ms, 50)), 4),
+		"p95_ms": round(float(np.percentile(ms, 95)), 4),
+		"p99_ms": round(float(np.percentile(ms, 99)), 4)}
+
+def time_calls(fn, items, repeats=1):
+	# time `fn` on every item, `repeats` times over
+	latencies = []
+	for _ in range(repeats):
+		for item in items:
+			start = time.perf_counter()
+			fn(item)
+			latencies.append(time.perf_counter() - start)
+
+	return latencies
+
+def load_images(imageDir, widths, augment):
+	# the bundled images resized to the kiosk-like widths, optionally with
+	# a mirrored and a darker/brighter copy of every resize
+	images = []
+	for imagePath in sorted(paths.list_images(imageDir)):
+		image = cv2.imread(imagePath)
+		if image is None:
+			continue
+
+		for width in widths:
+			h = int(round(image.shape[0] * width / float(image.shape[1])))
+			resized = cv2.resize(image, (width, h))
+			images.append(resized)
+
+			if augment:
+				images.append(cv2.flip(resized, 1))
+				images.append(cv2.convertScaleAbs(resized, alpha=0.7, beta=0))
+				images.append(cv2.convertScaleAbs(resized, alpha=1.2, beta=20))
+
+	return images
+
+def bench_color(images, repeats):
+	# the frame conversion of the recognizer and the grayscale conversion
+	# of the encoder
+	rows = [summarize("color", "bgr2rgb", time_calls(
+		lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2RGB), images,
+		repeats))]
+
+	def gray(image):
+		rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+		gray = cv2.cvtColor(rgb, cv2.COLOR_BGR2GRAY)
+		return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+	rows.append(summarize("color", "encoder-gray", time_calls(gray,
+		images, repeats)))
+
+	return rows
+
+def bench_detection(rgbs, scales, repeats):
+	# hog detection on the frame downscaled the way the engine does it
+	rows = []
+	for scale in scales:
+		smalls = [cv2.resize(rgb, (0, 0), fx=scale, fy=scale)
+			if scale != 1.0 else rgb for rgb in rgbs]
+		rows.append(summarize("detect", "hog@{}".format(scale), time_calls(
+			lambda small: face_recognition.face_locations(small,
+				model="hog"), smalls, repeats)))
+
+	return rows
+
+def bench_encoding(rgbs, repeats):
+	# embed the detected faces, images without a detection are embedded
+	# over the whole frame so every image contributes a sample
+	samples = []
+	for rgb in rgbs:
+		boxes = face_recognition.face_locations(rgb, model="hog")
+		if len(boxes) == 0:
+			boxes = [(0, rgb.shape[1], rgb.shape[0], 0)]
+		samples.append((rgb, boxes))
+
+	latencies = time_calls(lambda s: face_recognition.face_encodings(*s),
+		samples, repeats)
+
+	return [summarize("encode", "dlib", latencies)]
+
+def build_recognizers(encodings, names, threshold, skipSVC):
+	# every recognizer backend, built from the same gallery
+	recognizers = [
+		("nn-gallery", lambda: NearestNeighborRecognizer(encodings, names,
+			threshold=threshold, mode="gallery")),
+		("nn-centroid", lambda: NearestNeighborRecognizer(encodings, names,
+			threshold=threshold, mode="centroid")),
+		("prototype", lambda: PrototypeRecognizer.fit(encodings, names,
+			threshold=threshold)),
+		("index", lambda: IndexRecognizer(EmbeddingIndex.build(encodings,
+			names), threshold=threshold)),
+	]
+
+	if not skipSVC:
+		def svc():
+			# trained exactly like train_model.py does
+			from sklearn.preprocessing import LabelEncoder
+			from sklearn.svm import SVC
+			le = LabelEncoder()
+			labels = le.fit_transform(names)
+			model = SVC(C=1.0, kernel="linear", probability=True)
+			model.fit(encodings, labels)
+			return SVCRecognizer(model, le)
+
+		recognizers.insert(0, ("svc", svc))
+
+	return recognizers
+
+def bench_classification(sizes, perPerson, queries, threshold, skipSVC,
+	rng):
+	# single-face predict latency (the per-frame case) of every backend
+	# across gallery sizes, plus the build time of each backend
+	rows = []
+	for people in sizes:
+		(centres, encodings, names) = synthetic_gallery(people, perPerson,
+			rng)
+		idxs = rng.randint(0, people, size=queries)
+		Q = centres[idxs] + rng.randn(queries, 128).astype("float32") * 0.03
+
+		for (name, build) in build_recognizers(encodings, names, threshold,
+			skipSVC):
+			try:
+				start = time.perf_counter()
+				recognizer = build()
+				buildTime = time.perf_counter() - start
+			except ImportError as e:
+				print("[INFO] skipping {}: {}".format(name, e))
+				continue
+
+			case = "{}@{}".format(name, people)
+			rows.append(summarize("classify-build", case, [buildTime]))
+			rows.append(summarize("classify", case, time_calls(
+				lambda q: recognizer.predict([q]), Q)))
+
+	return rows
+
+def bench_lookup(tmpDir, students, queries, rng):
+	# name lookups against a synthetic TinyDB file of `students` rows and
+	# against the same rows in SQLite
+	dbPath = os.path.join(tmpDir, "students.json")
+	records = {str(i + 1): {"{:04d}".format(i): ["student {}".format(i),
+		"enrolled"]} for i in range(students)}
+	with open(dbPath, "w") as f:
+		json.dump({"student": records}, f)
+
+	ids = ["{:04d}".format(i) for i in rng.randint(0, students,
+		size=queries)]
+	rows = []
+
+	for backend in ("json", "sqlite"):
+		start = time.perf_counter()
+		if backend == "json":
+			index = StudentIndex(dbPath)
+		else:
+			index = SQLiteStudents(SQLiteDatabase(os.path.join(tmpDir,
+				"students.db")))
+			migrate_students_json(dbPath, index)
+		loadTime = time.perf_counter() - start
+
+		case = "students@{}".format(students)
+		if backend != "json":
+			case = "{}-{}".format(backend, case)
+		rows.append(summarize("lookup-load", case, [loadTime]))
+		rows.append(summarize("lookup", case, time_calls(index.get, ids)))
+
+	return rows
+
+def bench_attendance(tmpDir, students, batch):
+	# marking attendance (the per-recognition cost) and flushing a batch
+	# of events to the fsynced per-day log or the SQLite database
+	now = datetime.now()
+	ids = ["{:04d}".format(i) for i in range(students)]
+	stamp = now.strftime("%Y-%m-%d %H:%M:%S")
+	events = [AttendanceEvent(id, "student " + id, stamp) for id in ids]
+	rows = []
+
+	for backend in ("json", "sqlite"):
+		if backend == "json":
+			log = AttendanceLog(os.path.join(tmpDir, "attendance"))
+		else:
+			log = SQLiteAttendanceLog(SQLiteDatabase(os.path.join(tmpDir,
+				"attendance.db")))
+		ledger = AttendanceLedger(log, flush_interval=0)
+		prefix = "" if backend == "json" else backend + "-"
+
+		marks = time_calls(lambda id: ledger.mark(id, "student " + id,
+			now), ids)
+
+		# an already marked student is the common case on a busy day
+		repeats = time_calls(lambda id: ledger.mark(id, "student " + id,
+			now), ids)
+
+		# one flush of everything marked, then appends of `batch` events
+		# so the commit cost per batch shows up
+		start = time.perf_counter()
+		ledger.flush()
+		flushTime = time.perf_counter() - start
+
+		appends = time_calls(log.append, [events[i:i + batch]
+			for i in range(0, len(events), batch)])
+
+		rows.extend([summarize("attendance", prefix + "mark-new", marks),
+			summarize("attendance", prefix + "mark-repeat", repeats),
+			summarize("attendance", "{}flush@{}".format(prefix, students),
+				[flushTime]),
+			summarize("attendance", "{}append@{}".format(prefix, batch),
+				appends)])
+
+	return rows
+
+def compare(rows, baseline, tolerance):
+	# compare the p50 of every case with the baseline, returning the rows
+	# that got slower by more than the tolerance
+	previous = {(r["stage"], r["case"]): r for r in baseline["results"]}
+	regressions = []
+
+	print("{:<16} {:<22} {:>11} {:>11} {:>8}".format("stage", "case",
+		"base p50", "p50", "change"))
+	for row in rows:
+		base = previous.get((row["stage"], row["case"]))
+		if base is None or base["p50_ms"] <= 0:
+			continue
+
+		change = row["p50_ms"] / base["p50_ms"] - 1.0
+		flag = ""
+		if change > tolerance:
+			regressions.append(row)
+			flag = "  REGRESSION"
+
+		print("{:<16} {:<22} {:>9.3f}ms {:>9.3f}ms {:>+7.1%}{}".format(
+			row["stage"], row["case"], base["p50_ms"], row["p50_ms"],
+			change, flag))
+
+	return regressions
+
+def write_results(result, prefix):
+	# write the result as JSON (also usable as a baseline) and CSV
+	with open(prefix + ".json", "w") as f:
+		json.dump(result, f, indent=4)
+
+	with open(prefix + ".csv", "w", newline="") as f:
+		writer = csv.DictWriter(f, fieldnames=FIELDS)
+		writer.writeheader()
+		writer.writerows(result["results"])
+
+# construct the argument parser and parse the arguments
+ap = argparse.ArgumentParser()
+ap.add_argument("-i", "--images", default="unknown",
+	help="directory of the images used for the image stages")
+ap.add_argument("-w", "--widths", default="320,640,960",
+	help="comma separated widths the images are resized to")
+ap.add_argument("-a", "--augment", type=int, default=1,
+	help="add mirrored and brightness augmented copies (0 disables)")
+ap.add_argument("-d", "--det-scales", default="1.0,0.5,0.25",
+	help="comma separated detection downscale factors")
+ap.add_argument("-g", "--gallery-sizes", default="10,100,500",
+	help="comma separated gallery sizes (number of people)")
+ap.add_argument("-p", "--per-person", type=int, default=10,
+	help="encodings per person in the synthetic galleries")
+ap.add_argument("-q", "--queries", type=int, default=200,
+	help="queries per classification and lookup case")
+ap.add_argument("-n", "--repeats", type=int, default=3,
+	help="repeats of the image stages")
+ap.add_argument("-s", "--students", type=int, default=1000,
+	help="students in the lookup and attendance stages")
+ap.add_argument("-t", "--threshold", type=float, default=0.5,
+	help="distance threshold of the nearest neighbour recognizers")
+ap.add_argument("--stages", default="color,detect,encode,classify,lookup,attendance",
+	help="comma separated stages to run")
+ap.add_argument("--skip-svc", action="store_true",
+	help="do not train the SVC (slow for large galleries)")
+ap.add_argument("-o", "--output", default="output/bench_pipeline",
+	help="path prefix of the .json and .csv result files")
+ap.add_argument("-b", "--baseline", default=None,
+	help="baseline result file (.json) to compare against")
+ap.add_argument("--tolerance", type=float, default=0.2,
+	help="allowed p50 slowdown against the baseline before failing")
+ap.add_argument("--update-baseline", action="store_true",
+	help="write the results to the baseline file instead of comparing")
+ap.add_argument("-r", "--seed", type=int, default=42,
+	help="random seed")
+args = vars(ap.parse_args())
+
+stages = set(args["stages"].split(","))
+rng = np.random.RandomState(args["seed"])
+rows = []
+
+# the image stages share the resized and augmented images
+if stages & {"color", "detect", "encode"}:
+	images = load_images(args["images"], [int(w) for w in
+		args["widths"].split(",")], args["augment"] > 0)
+	print("[INFO] {} benchmark images from {}".format(len(images),
+		args["images"]))
+	rgbs = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images]
+
+if "color" in stages:
+	print("[INFO] timing colour conversion...")
+	rows.extend(bench_color(images, args["repeats"]))
+
+if "detect" in stages:
+	print("[INFO] timing detection...")
+	rows.extend(bench_detection(rgbs, [float(s) for s in
+		args["det_scales"].split(",")], args["repeats"]))
+
+if "encode" in stages:
+	print("[INFO] timing encoding...")
+	rows.extend(bench_encoding(rgbs, args["repeats"]))
+
+if "classify" in stages:
+	print("[INFO] timing classification...")
+	rows.extend(bench_classification([int(s) for s in
+		args["gallery_sizes"].split(",")], args["per_person"],
+		args["queries"], args["threshold"], args["skip_svc"], rng))
+
+# the storage stages work on throwaway files
+with tempfile.TemporaryDirectory() as tmpDir:
+	if "lookup" in stages:
+		print("[INFO] timing student lookup...")
+		rows.extend(bench_lookup(tmpDir, args["students"],
+			args["queries"], rng))
+
+	if "attendance" in stages:
+		print("[INFO] timing attendance persistence...")
+		rows.extend(bench_attendance(tmpDir, args["students"], 10))
+
+result = {"started": datetime.now().isoformat(timespec="seconds"),
+	"platform": platform.platform(), "python": platform.python_version(),
+	"params": args, "results": rows}
+
+# write the results, next to the output prefix's directory
+outputDir = os.path.dirname(args["output"])
+if outputDir:
+	os.makedirs(outputDir, exist_ok=True)
+write_results(result, args["output"])
+print("[INFO] results written to {}.json/.csv".format(args["output"]))
+
+for row in rows:
+	print("{:<16} {:<22} n={:<5} p50 {:>9.3f}ms  p95 {:>9.3f}ms".format(
+		row["stage"], row["case"], row["n"], row["p50_ms"], row["p95_ms"]))
+
+# save or compare against the baseline
+if args["baseline"] is not None:
+	if args["update_baseline"]:
+		with open(args["baseline"], "w") as f:
+			json.dump(result, f, indent=4)
+		print("[INFO] baseline updated: {}".format(args["baseline"]))
+
+	else:
+		with open(args["baseline"], "r") as f:
+			baseline = json.load(f)
+
+		regressions = compare(rows, baseline, args["tolerance"])
+		if len(regressions) > 0:
+			print("[ERROR] {} case(s) slower than the baseline by more "
+				"than {:.0%}".format(len(regressions), args["tolerance"]))
+			sys.exit(1)
+
+		print("[INFO] no regressions against {}".format(args["baseline"]))
@@ -0,0 +1,107 @@
+# USAGE
+# python benchmarks/bench_recognizers.py --conf config/config.json
+
+# import the necessary packages
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project.utils import Conf
+from project.recognition import SVCRecognizer, NearestNeighborRecognizer
+from project.encoding import open_encoding_store
+from project.models import resolve_models
+from project.recognition.recognizers import UNKNOWN
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import SVC
+import numpy as np
+import argparse
+import time
+
+def split(names, test_size, holdout_people, rng):
+	# split every person's encodings into train/test and hold some
+	# people out of the gallery entirely to measure open-set rejection
+	people = sorted(set(names))
+	rng.shuffle(people)
+	heldOut = set(people[:holdout_people])
+	(train, test) = ([], [])
+
+	for person in people:
+		idxs = [i for (i, n) in enumerate(names) if n == person]
+		rng.shuffle(idxs)
+		if person in heldOut:
+			test.extend(idxs)
+			continue
+		k = max(1, int(round(len(idxs) * test_size))) if len(idxs) > 1 else 0
+		test.extend(idxs[:k])
+		train.extend(idxs[k:])
+
+	return (np.array(train), np.array(test), heldOut)
+
+def evaluate(name, recognizer, X, y, heldOut, buildTime):
+	# time single-face queries (the per-frame case) and score accuracy,
+	# held out people count as correct only when reported as unknown
+	latencies = []
+	correct = 0
+
+	for (x, label) in zip(X, y):
+		start = time.perf_counter()
+		(pred, _) = recognizer.predict([x])[0]
+		latencies.append(time.perf_counter() - start)
+		expected = UNKNOWN if label in heldOut else label
+		correct += int(pred == expected)
+
+	# time one batched call over every query
+	start = time.perf_counter()
+	recognizer.predict(list(X))
+	batch = time.perf_counter() - start
+
+	latencies = np.array(latencies) * 1000.0
+	print("{:<18} build {:>8.1f}ms  p50 {:>7.3f}ms  p99 {:>7.3f}ms  "
+		"batch/face {:>7.3f}ms  accuracy {:.3f}".format(name,
+		buildTime * 1000.0, np.percentile(latencies, 50),
+		np.percentile(latencies, 99), batch * 1000.0 / max(1, len(X)),
+		correct / max(1, len(X))))
+
+# construct the argument parser and parse the arguments
+ap = argparse.ArgumentParser()
+ap.add_argument("-c", "--conf", default="config/config.json",
+	help="Path to the input configuration file")
+ap.add_argument("-t", "--test-size", type=float, default=0.2,
+	help="fraction of each person's encodings used as queries")
+ap.add_argument("-o", "--holdout-people", type=int, default=1,
+	help="number of people left out of the gallery (open-set queries)")
+ap.add_argument("-s", "--seed", type=int, default=42,
+	help="random seed for the split")
+args = vars(ap.parse_args())
+
+# load the configuration and the face encodings
+conf = Conf(args["conf"])
+print("[INFO] loading face encodings...")
+store = open_encoding_store(resolve_models(conf))
+
+X = np.asarray(store.encodings, dtype="float32")
+names = list(store.names)
+(train, test, heldOut) = split(names, args["test_size"],
+	args["holdout_people"], np.random.RandomState(args["seed"]))
+yTrain = [names[i] for i in train]
+yTest = [names[i] for i in test]
+print("[INFO] {} gallery encodings, {} queries, held out: {}".format(
+	len(train), len(test), sorted(heldOut)))
+
+# train the SVC exactly like train_model.py does
+start = time.perf_counter()
+le = LabelEncoder()
+labels = le.fit_transform(yTrain)
+svc = SVC(C=1.0, kernel="linear", probability=True)
+svc.fit(X[train], labels)
+evaluate("svc", SVCRecognizer(svc, le), X[test], yTest, heldOut,
+	time.perf_counter() - start)
+
+# build the nearest neighbour recognizers in both modes
+threshold = conf["nn_threshold"] or 0.5
+for mode in ("gallery", "centroid"):
+	start = time.perf_counter()
+	nn = NearestNeighborRecognizer(X[train], yTrain, threshold=threshold,
+		mode=mode)
+	evaluate("nn-{}".format(mode), nn, X[test], yTest, heldOut,
+		time.perf_counter() - start)
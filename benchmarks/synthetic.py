@@ -0,0 +1,12 @@
+# import the necessary packages
+import numpy as np
+
+def synthetic_gallery(people, perPerson, rng):
+	# clustered 128-d embeddings that mimic the dlib encoder: one centre
+	# per person and small per-image noise
+	centres = rng.randn(people, 128).astype("float32") * 0.1
+	noise = rng.randn(people * perPerson, 128).astype("float32") * 0.03
+	encodings = np.repeat(centres, perPerson, axis=0) + noise
+	names = np.repeat(np.arange(people), perPerson).astype(str)
+
+	return (centres, encodings, names)
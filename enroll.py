@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from project.utils import Conf
-from tinydb import TinyDB, where
+from project.encoding.metadata import write_face_metadata, crop_box
+from project.encoding.selection import create_selector, largest_box
+from project.encoding.streaming import StreamingEnroller
+from project.storage import open_students
 import face_recognition
 import cv2
 import os
@@ -53,27 +56,19 @@ def enroll_student():
         return
     
     conf = Conf(config_file)
-    # Initialize database
-    db = TinyDB(conf["db_path"])
-    student_table = db.table("student")
+    # Open the student repository of the configured storage backend
+    students = open_students(conf)
 
     # Search for the student
-    found_students = []
-    for record in student_table.all():
-        for sub_key, details in record.items():
-                if student_id==sub_key:
-                    found_students.append(student_id)
-
-    # Print the result
-    if found_students:
-        # print(f"Student(s) with ID {student_id}: {found_students}")
-        messagebox.showinfo("Already Enrolled", f"Person ID: '{found_students[0]}' is already enrolled.")
-        db.close()
+    if student_id in students:
+        messagebox.showinfo("Already Enrolled", f"Person ID: '{student_id}' is already enrolled.")
         enroll_button.config(state=tk.NORMAL)  # Re-enable the button
         return
 
     # Thread for face enrollment to prevent GUI freezing
     def process_enrollment():
+        # In streaming mode every saved face is encoded while the capture keeps running
+        enroller = StreamingEnroller(conf, student_id).start() if conf["enroll_streaming"] else None
         try:
             # Start camera capture
             vs = cv2.VideoCapture(0, cv2.CAP_DSHOW)
@@ -82,25 +77,47 @@ def enroll_student():
             student_path = os.path.join(conf["dataset_path"], conf["class"], student_id)
             os.makedirs(student_path, exist_ok=True)
 
+            # In selection mode only sharp faces that differ from the ones already kept are saved
+            selector = create_selector(conf)
+            max_frames = conf["enroll_max_frames"] or 0
+
             total_saved = 0
+            frames_seen = 0
             while total_saved < conf["face_count"]:
                 if stop_event.is_set():  # Check if the stop event is triggered
                     messagebox.showinfo("Process Stopped", "Enrollment process has been stopped.")
                     break
 
+                # Stop looking for new poses once the frame budget is used up
+                if selector is not None and max_frames and frames_seen >= max_frames:
+                    break
+
                 ret, frame = vs.read()
                 if not ret:
                     break
+                frames_seen += 1
 
                 frame = cv2.flip(frame, 1)
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 boxes = face_recognition.face_locations(rgb_frame, model=conf["detection_method"])
                 frame_copy = frame.copy()
 
+                # Only the enrollee (the largest face) is offered to the selector
+                status = "Saving"
+                if selector is not None and len(boxes) > 0:
+                    boxes = [largest_box(boxes)]
+
                 # Draw boxes and save face images
-                for (top, right, bottom, left) in boxes:
+                for box in boxes:
+                    (top, right, bottom, left) = box
                     cv2.rectangle(frame, (left, top), (right, bottom), (0,0,255), 2)
 
+                    if selector is not None:
+                        candidate = selector.consider(rgb_frame, box)
+                        if not candidate.kept:
+                            status = "Move your head slightly" if candidate.reason == "duplicate" else "Hold still, face the camera"
+                            continue
+
                     padding = 70
                     top = max(0, top - padding)
                     bottom = min(frame.shape[0], bottom + padding)
@@ -110,12 +127,18 @@ def enroll_student():
                     if total_saved < conf["face_count"]:
                         save_path = os.path.join(student_path, f"{str(total_saved).zfill(5)}.png")
                         cv2.imwrite(save_path, face_image)
+
+                        # Record the face box inside the crop so encoding can skip detection
+                        write_face_metadata(save_path, crop_box(box, (top, right, bottom, left)), face_image.shape)
+                        if enroller is not None:
+                            # Reuse the embedding the selector computed for this face
+                            enroller.submit(save_path, candidate.encoding if selector is not None else None)
                         total_saved += 1
                         # Update progress safely using root.after
                         root.after(0, update_progress, total_saved, conf["face_count"])
 
                 # Draw the status on to the frame
-                cv2.putText(frame, "Status: Saving", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+                cv2.putText(frame, f"Status: {status}", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
                 cv2.imshow("Frame", frame)
                 cv2.waitKey(1)
@@ -123,16 +146,33 @@ def enroll_student():
             vs.release()
             cv2.destroyAllWindows()
 
-            if not stop_event.is_set():
+            if not stop_event.is_set() and total_saved == 0:
+                messagebox.showerror("Error", "No usable face was captured, please try again.")
+
+            elif not stop_event.is_set():
                 # Add student to database if enrollment was successful
-                student_table.insert({student_id:[student_name, "enrolled"]})
+                students.add(student_id, student_name, cls=conf["class"])
+
+                # Add the encodings to the store and the model, no full encode/train is needed
+                if enroller is not None:
+                    root.after(0, percentage_label.config, {"text": "Updating model..."})
+                    try:
+                        (_, trained) = enroller.commit()
+                        if not trained:
+                            messagebox.showinfo("Model", "The face encodings were stored, run train_model.py to add the person to the SVC model.")
+                    except ValueError as e:
+                        messagebox.showwarning("Model", f"Enrolled, but the model could not be updated: {e}\nRun encode_faces.py and train_model.py.")
+                    enroller = None
+
                 messagebox.showinfo("Success", f"Enrollment completed for {student_name}.")
                 reset_form()
 
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {e}")
         finally:
-            db.close()
+            # Drop the pending encodings of a stopped or failed enrollment
+            if enroller is not None:
+                enroller.finish()
             enroll_button.config(state=tk.NORMAL)  # Re-enable the button after the process completes
 
     # Start enrollment process in a new thread
@@ -0,0 +1,48 @@
+# import the necessary packages
+from project.utils import Conf
+from project.recognition import FaceAttendanceEngine
+import argparse
+import time
+
+# construct the argument parser and parse the arguments
+ap = argparse.ArgumentParser()
+ap.add_argument("-s", "--source", default="0",
+	help="camera index, video file or directory of images")
+ap.add_argument("-c", "--conf", default="config/config.json",
+	help="Path to the input configuration file")
+ap.add_argument("-m", "--max-frames", type=int, default=None,
+	help="stop after this many frames")
+args = vars(ap.parse_args())
+
+# load the configuration file and initialize the engine
+conf = Conf(args["conf"])
+engine = FaceAttendanceEngine(conf)
+
+# loop over the results produced by the engine
+print("[INFO] starting recognition on {}...".format(args["source"]))
+frames = 0
+start = time.perf_counter()
+
+# the pending attendance is flushed by engine.close(), it must run even
+# when the loop is interrupted (Ctrl-C) or fails
+try:
+	for result in engine.run(args["source"], max_frames=args["max_frames"]):
+		frames += 1
+		for r in result.recognitions:
+			print("[INFO] frame {}: {} ({}) p={:.2f}".format(frames, r.id,
+				r.name, r.probability))
+		for event in result.events:
+			print("[INFO] attendance: {} ({}) at {}".format(event.id,
+				event.name, event.date_time))
+
+	# display the throughput
+	elapsed = time.perf_counter() - start
+	print("[INFO] {} frames in {:.2f}s ({:.2f} FPS)".format(frames, elapsed,
+		frames / elapsed if elapsed > 0 else 0.0))
+
+	# display the per-stage latencies when the metrics are enabled
+	for (name, s) in sorted(engine.metrics.snapshot()["stages"].items()):
+		print("[INFO] {:<10} p50 {:>8.2f}ms  p95 {:>8.2f}ms  p99 {:>8.2f}ms".format(
+			name, s["p50_ms"], s["p95_ms"], s["p99_ms"]))
+finally:
+	engine.close()
@@ -0,0 +1,164 @@
+# USAGE
+# python manage.py import --src incoming --names names.csv
+# python manage.py bulk-import --manifest cohort.csv --jobs 8
+# python manage.py bulk-import --src incoming --video-frames 15
+# python manage.py encode --jobs 8
+# python manage.py train
+# python manage.py delete --id 03
+# python manage.py --report output/rebuild.json rebuild --jobs 8
+
+# import the necessary packages
+from project.utils import Conf, StageReport
+from project.encoding import encode_dataset, open_encoding_store
+from project.recognition.training import train
+from project.maintenance import delete_person, import_people
+from project.importer import bulk_import, read_manifest, scan_tree
+from project.models import publish_models
+import argparse
+import json
+import csv
+import sys
+
+def load_names(path):
+	# read an optional "id,name" CSV file
+	if path is None:
+		return {}
+
+	with open(path, newline="", encoding="utf-8") as f:
+		return {row[0]: row[1] for row in csv.reader(f) if len(row) >= 2}
+
+def print_progress(done, total):
+	sys.stdout.write("\r[INFO] encoded {}/{} images".format(done, total))
+	sys.stdout.flush()
+	if done == total:
+		sys.stdout.write("\n")
+
+def run_encode(conf, report, jobs):
+	with report.stage("encode") as record:
+		(images, encodings) = encode_dataset(conf, jobs=jobs,
+			progress=print_progress)
+		record["items"] = images
+		record["encodings"] = encodings
+
+def run_train(conf, report):
+	with report.stage("load") as record:
+		store = open_encoding_store(conf)
+		record["items"] = len(store)
+
+	with report.stage("train") as record:
+		train(conf, store)
+		record["items"] = len(store)
+		record["backend"] = conf["recognizer_backend"] or "svc"
+
+def main():
+	# construct the argument parser and the subcommands
+	ap = argparse.ArgumentParser(description="headless dataset and model maintenance")
+	ap.add_argument("-c", "--conf", default="config/config.json",
+		help="Path to the input configuration file")
+	ap.add_argument("-r", "--report", default=None,
+		help="path of the JSON timing report")
+	sub = ap.add_subparsers(dest="command", required=True)
+
+	imp = sub.add_parser("import", help="enroll people from <src>/<id>/ image folders")
+	imp.add_argument("-s", "--src", required=True,
+		help="directory with one sub-directory of images per person id")
+	imp.add_argument("-n", "--names", default=None,
+		help="optional CSV file of id,name rows")
+
+	bulk = sub.add_parser("bulk-import", help="detect, crop, encode and enroll "
+		"people from images and videos in parallel")
+	src = bulk.add_mutually_exclusive_group(required=True)
+	src.add_argument("-s", "--src", help="directory with one sub-directory of "
+		"images and videos per person id")
+	src.add_argument("-m", "--manifest", help="CSV manifest of id,name,media rows "
+		"(media separated by ';')")
+	bulk.add_argument("-n", "--names", default=None,
+		help="optional CSV file of id,name rows (with --src)")
+	bulk.add_argument("-j", "--jobs", type=int, default=0,
+		help="number of worker processes (0 uses every core)")
+	bulk.add_argument("-f", "--video-frames", type=int, default=10,
+		help="frames sampled from every video")
+	bulk.add_argument("--no-augment", action="store_true",
+		help="do not add augmented variants of the still images")
+	bulk.add_argument("--no-train", action="store_true",
+		help="only write the encodings, train later")
+
+	enc = sub.add_parser("encode", help="encode new or changed dataset images")
+	enc.add_argument("-j", "--jobs", type=int, default=None,
+		help="number of encoding processes (0 uses every core)")
+
+	sub.add_parser("train", help="train the configured recognizer")
+
+	dele = sub.add_parser("delete", help="delete a person and update the model")
+	dele.add_argument("-i", "--id", required=True, help="person id to delete")
+
+	reb = sub.add_parser("rebuild", help="encode and train in one go")
+	reb.add_argument("-j", "--jobs", type=int, default=None,
+		help="number of encoding processes (0 uses every core)")
+
+	args = vars(ap.parse_args())
+
+	# load the configuration and start the report
+	conf = Conf(args["conf"])
+	params = {k: v for (k, v) in args.items() if k not in ("conf", "report",
+		"command")}
+	report = StageReport(args["command"], **params)
+	status = 0
+
+	if args["command"] == "import":
+		with report.stage("import") as record:
+			imported = import_people(conf, args["src"], load_names(args["names"]))
+			record["items"] = sum(imported.values())
+			record["people"] = len(imported)
+		print("[INFO] imported {} people".format(len(imported)))
+
+	elif args["command"] == "bulk-import":
+		people = read_manifest(args["manifest"]) if args["manifest"] else \
+			scan_tree(args["src"], load_names(args["names"]))
+		with report.stage("bulk-import") as record:
+			imported = bulk_import(conf, people, jobs=args["jobs"],
+				video_frames=args["video_frames"],
+				augment=not args["no_augment"], train_model=not args["no_train"],
+				progress=lambda done, total: print(
+					"[INFO] processed {}/{} people".format(done, total)))
+			record["items"] = sum(imported.values())
+			record["people"] = len(imported)
+		print("[INFO] imported {} people".format(len(imported)))
+
+	elif args["command"] == "encode":
+		with publish_models(conf) as staged:
+			run_encode(staged, report, args["jobs"])
+
+	elif args["command"] == "train":
+		with publish_models(conf) as staged:
+			run_train(staged, report)
+
+	elif args["command"] == "delete":
+		with report.stage("delete") as record:
+			result = delete_person(conf, args["id"],
+				progress=lambda message: print("[INFO] {}...".format(message)))
+			record["items"] = 1 if result is not None else 0
+		if result is None:
+			print("[ERROR] no person found with ID {}".format(args["id"]))
+			status = 1
+
+	elif args["command"] == "rebuild":
+		# the new encodings and model are published together
+		with publish_models(conf) as staged:
+			run_encode(staged, report, args["jobs"])
+			run_train(staged, report)
+
+	# write (or print) the machine readable report
+	if args["report"] is not None:
+		report.write(args["report"])
+		print("[INFO] report written to {}".format(args["report"]))
+	else:
+		print(json.dumps(report.as_dict(), indent=4))
+
+	return status
+
+# the encode, rebuild and bulk-import pools re-import this module in
+# every worker (spawn, the default on Windows), so only run the command
+# when executed as a script
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,35 @@
+# import the necessary packages
+from .ledger import AttendanceLedger
+from .ledger import AttendanceEvent
+from .log import AttendanceLog
+from .log import migrate_attendance_json
+from .sqlite import SQLiteAttendanceLog
+from .sqlite import migrate_attendance_log
+from ..storage import open_database
+import os
+
+def open_attendance_log(conf):
+	# open the attendance log of the configured storage backend,
+	# migrating the legacy attendance.json into it the first time (and,
+	# for the SQLite backend, the JSON lines log as well)
+	logDir = conf["attendance_log_dir"] or "attendance"
+
+	if conf["storage_backend"] == "sqlite":
+		db = open_database(conf)
+		log = SQLiteAttendanceLog(db)
+		if db.get_meta("attendance_migrated") is None:
+			if os.path.isdir(logDir):
+				count = migrate_attendance_log(AttendanceLog(logDir), log)
+				print("[INFO] migrated {} attendance records from {}".format(
+					count, logDir))
+			db.set_meta("attendance_migrated", logDir)
+	else:
+		log = AttendanceLog(logDir)
+
+	legacyPath = conf["attendance_path"]
+	if legacyPath and os.path.exists(legacyPath):
+		count = migrate_attendance_json(legacyPath, log)
+		print("[INFO] migrated {} attendance records from {}".format(
+			count, legacyPath))
+
+	return log
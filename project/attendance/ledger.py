@@ -0,0 +1,109 @@
+# import the necessary packages
+from collections import namedtuple
+from datetime import datetime
+import threading
+import sqlite3
+
+# an attendance record committed to the ledger
+AttendanceEvent = namedtuple("AttendanceEvent", ["id", "name", "date_time"])
+
+class AttendanceLedger:
+	def __init__(self, log, flush_interval=5.0):
+		# store the backing append-only log and the write-behind interval
+		# (in seconds)
+		self.log = log
+		self.flushInterval = flush_interval
+		self.lock = threading.Lock()
+		self.flushLock = threading.Lock()
+		self.stopped = threading.Event()
+		self.thread = None
+
+		# the set of (id, date) pairs already marked answers the
+		# duplicate check in O(1), days are loaded from the log the first
+		# time they are seen
+		self.marked = set()
+		self.loadedDates = set()
+
+		# events recorded since the last flush
+		self.pending = []
+
+	def _load_date(self, date):
+		# pull the ids already marked on `date` from the log (the caller
+		# holds the lock)
+		if date in self.loadedDates:
+			return
+
+		for e in self.log.read_segment(date):
+			self.marked.add((e.id, date))
+		self.loadedDates.add(date)
+
+	def is_marked(self, id, date):
+		with self.lock:
+			self._load_date(date)
+			return (id, date) in self.marked
+
+	def mark(self, id, name, now=None):
+		# record the attendance unless the student was already marked on
+		# the same day, returning the new event (or None)
+		now = now or datetime.now()
+		date = now.strftime("%Y-%m-%d")
+
+		with self.lock:
+			self._load_date(date)
+			if (id, date) in self.marked:
+				return None
+
+			event = AttendanceEvent(id, name,
+				now.strftime("%Y-%m-%d %H:%M:%S"))
+			self.marked.add((id, date))
+			self.pending.append(event)
+
+		return event
+
+	def flush(self):
+		# append the events recorded since the last flush to the log,
+		# the flush lock keeps concurrent flushes in order
+		with self.flushLock:
+			with self.lock:
+				pending = self.pending
+				self.pending = []
+
+			if len(pending) == 0:
+				return 0
+
+			try:
+				self.log.append(pending)
+			except Exception:
+				# put the events back so the next flush retries them
+				with self.lock:
+					self.pending = pending + self.pending
+				raise
+
+		return len(pending)
+
+	def start(self):
+		# start the background thread that flushes the pending events
+		if self.thread is None:
+			self.thread = threading.Thread(target=self._run, daemon=True)
+			self.thread.start()
+
+		return self
+
+	def _run(self):
+		# a failed flush keeps the events pending and is retried on the
+		# next tick (a full disk, a locked SQLite database), the thread
+		# must outlive it
+		while not self.stopped.wait(self.flushInterval):
+			try:
+				self.flush()
+			except (OSError, sqlite3.Error) as e:
+				print("[ERROR] failed to flush attendance: {}".format(e))
+
+	def close(self):
+		# stop the flush thread and write whatever is still pending
+		self.stopped.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+
+		self.flush()
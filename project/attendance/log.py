@@ -0,0 +1,136 @@
+# import the necessary packages
+from .ledger import AttendanceEvent
+from ..utils.atomic import atomic_write
+from datetime import datetime
+import threading
+import json
+import os
+
+class AttendanceLog:
+	def __init__(self, logDir):
+		# the log is a directory of append-only JSON lines segments, one
+		# per day (YYYY-MM-DD.jsonl), so the file names double as the
+		# date index for range queries
+		self.logDir = logDir
+		self.lock = threading.Lock()
+		os.makedirs(logDir, exist_ok=True)
+
+	def segment_path(self, date):
+		return os.path.join(self.logDir, "{}.jsonl".format(date))
+
+	def dates(self):
+		# return the sorted list of days that have a segment
+		return sorted(f[:-len(".jsonl")] for f in os.listdir(self.logDir)
+			if f.endswith(".jsonl"))
+
+	def append(self, events):
+		# group the events per day and append each group to its segment
+		# with a single fsynced write
+		byDate = {}
+		for e in events:
+			byDate.setdefault(e.date_time.split(" ")[0], []).append(e)
+
+		with self.lock:
+			for (date, group) in byDate.items():
+				lines = "".join(json.dumps(e._asdict()) + "\n"
+					for e in group)
+				with open(self.segment_path(date), "a") as file:
+					file.write(lines)
+					file.flush()
+					os.fsync(file.fileno())
+
+		return len(events)
+
+	def read_segment(self, date):
+		# yield the events of a single day, a torn last line left by a
+		# crash is skipped
+		try:
+			file = open(self.segment_path(date), "r")
+		except FileNotFoundError:
+			return
+
+		with file:
+			for line in file:
+				try:
+					record = json.loads(line)
+				except ValueError:
+					continue
+				yield AttendanceEvent(record["id"], record["name"],
+					record["date_time"])
+
+	def query(self, start=None, end=None, id=None, person=None, cls=None,
+		after=None, limit=None):
+		# yield the events between the `start` and `end` dates (inclusive,
+		# YYYY-MM-DD strings) of a student `id` or a `person` (id or
+		# name), ordered by (date_time, id) and starting after the
+		# (date_time, id) key `after` of the previous page, only the
+		# matching segments are opened (one at a time), the log has no
+		# class so `cls` matches nothing
+		if cls is not None:
+			return
+
+		if after is not None:
+			start = max(start or "", after[0].split(" ")[0])
+
+		count = 0
+		for date in self.dates():
+			if (start is not None and date < start) or \
+				(end is not None and date > end):
+				continue
+
+			for e in sorted(self.read_segment(date), key=lambda e:
+				(e.date_time, e.id)):
+				if (id is not None and e.id != id) or (person is not None
+					and person not in (e.id, e.name)):
+					continue
+				if after is not None and (e.date_time, e.id) <= tuple(after):
+					continue
+				if limit is not None and count >= limit:
+					return
+
+				count += 1
+				yield e
+
+	def delete(self, id):
+		# remove every event of a student, each affected segment is
+		# rewritten to a temporary file and renamed over the original
+		removed = 0
+
+		with self.lock:
+			for date in self.dates():
+				events = list(self.read_segment(date))
+				kept = [e for e in events if e.id != id]
+				if len(kept) == len(events):
+					continue
+
+				removed += len(events) - len(kept)
+				with atomic_write(self.segment_path(date), "w") as file:
+					file.write("".join(json.dumps(e._asdict()) + "\n"
+						for e in kept))
+
+		return removed
+
+def migrate_attendance_json(jsonPath, log):
+	# one-shot migration of the legacy `attendance.json` (latest record
+	# per student) into the append-only log, the legacy file is renamed
+	# so the migration never runs twice
+	try:
+		with open(jsonPath, "r") as file:
+			data = json.load(file)
+	except FileNotFoundError:
+		return 0
+
+	events = []
+	for (id, record) in data.get("attendance", {}).items():
+		dateTime = record.get("date_time", "")
+		try:
+			datetime.strptime(dateTime, "%Y-%m-%d %H:%M:%S")
+		except ValueError:
+			continue
+		events.append(AttendanceEvent(id, record.get("name", "unknown"),
+			dateTime))
+
+	log.append(sorted(events, key=lambda e: e.date_time))
+	os.replace(jsonPath, "{}.migrated".format(jsonPath))
+
+	return len(events)
@@ -0,0 +1,83 @@
+# import the necessary packages
+from .ledger import AttendanceEvent
+
+class SQLiteAttendanceLog:
+	def __init__(self, db):
+		# attendance events in the SQLite database, same interface as the
+		# JSON lines AttendanceLog
+		self.db = db
+
+	def dates(self):
+		# return the sorted list of days that have events
+		return [row[0] for row in self.db.query("SELECT DISTINCT date FROM "
+			"attendance ORDER BY date")]
+
+	def append(self, events):
+		# insert the events in a single transaction, a student already
+		# marked on the same day is ignored
+		with self.db.transaction() as conn:
+			conn.executemany("INSERT OR IGNORE INTO attendance (student_id, "
+				"name, date, date_time) VALUES (?, ?, ?, ?)", [(e.id, e.name,
+				e.date_time.split(" ")[0], e.date_time) for e in events])
+
+		return len(events)
+
+	def read_segment(self, date):
+		# yield the events of a single day
+		for row in self.db.query("SELECT student_id, name, date_time FROM "
+			"attendance WHERE date = ? ORDER BY date_time", (date,)):
+			yield AttendanceEvent(*row)
+
+	def query(self, start=None, end=None, id=None, person=None, cls=None,
+		after=None, limit=None):
+		# yield the events between the `start` and `end` dates (inclusive,
+		# YYYY-MM-DD strings) of a student `id`, a `person` (id or name)
+		# or the students of a class, ordered by (date_time, id) and
+		# starting after the (date_time, id) key `after` of the previous
+		# page, answered from the indexes
+		(where, params) = ([], [])
+		if start is not None:
+			where.append("date_time >= ?")
+			params.append(start)
+		if end is not None:
+			where.append("date_time <= ?")
+			params.append(end + " 23:59:59")
+		if id is not None:
+			where.append("student_id = ?")
+			params.append(id)
+		if person is not None:
+			where.append("(student_id = ? OR name = ?)")
+			params.extend([person, person])
+		if cls is not None:
+			where.append("student_id IN (SELECT id FROM students WHERE "
+				"class = ?)")
+			params.append(cls)
+		if after is not None:
+			where.append("(date_time, student_id) > (?, ?)")
+			params.extend([after[0], after[1]])
+
+		sql = "SELECT student_id, name, date_time FROM attendance"
+		if len(where) > 0:
+			sql += " WHERE " + " AND ".join(where)
+		sql += " ORDER BY date_time, student_id"
+		if limit is not None:
+			sql += " LIMIT {}".format(int(limit))
+
+		for row in self.db.query(sql, params):
+			yield AttendanceEvent(*row)
+
+	def delete(self, id):
+		# remove every event of a student
+		with self.db.transaction() as conn:
+			cursor = conn.execute("DELETE FROM attendance WHERE "
+				"student_id = ?", (id,))
+
+		return cursor.rowcount
+
+def migrate_attendance_log(source, target):
+	# copy every event of a JSON lines log into the SQLite log, the
+	# segments are left in place as a backup
+	events = list(source.query())
+	target.append(events)
+
+	return len(events)
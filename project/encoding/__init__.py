@@ -0,0 +1,12 @@
+# import the necessary packages
+from .encoder import encode_image
+from .encoder import encode_images
+from .encoder import encode_dataset
+from .cache import EncodingCache
+from .store import EncodingStore
+from .store import open_encoding_store
+from .metadata import write_face_metadata
+from .metadata import read_face_metadata
+from .metadata import crop_box
+from .selection import FrameSelector
+from .selection import create_selector
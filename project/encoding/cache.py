@@ -0,0 +1,73 @@
+# import the necessary packages
+from ..utils.atomic import atomic_write
+import hashlib
+import pickle
+import os
+
+def file_digest(path):
+	# sha1 of the file content
+	h = hashlib.sha1()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			h.update(block)
+
+	return h.hexdigest()
+
+class EncodingCache:
+	def __init__(self, path):
+		# the cache maps every image path to its (size, mtime) stat, its
+		# content digest, the person name and the face encodings
+		self.path = path
+		self.entries = {}
+		self.dirty = False
+
+		if path and os.path.exists(path):
+			with open(path, "rb") as f:
+				self.entries = pickle.load(f)
+
+	def lookup(self, imagePath):
+		# return the cached (name, encodings) of an unchanged image or
+		# None, the stat check is enough in the common case and the
+		# content digest catches files that were only touched or copied
+		entry = self.entries.get(imagePath)
+		if entry is None:
+			return None
+
+		st = os.stat(imagePath)
+		stat = (st.st_size, st.st_mtime_ns)
+		if entry["stat"] == stat:
+			return (entry["name"], entry["encodings"])
+
+		if entry["size"] == st.st_size and \
+			entry["digest"] == file_digest(imagePath):
+			entry["stat"] = stat
+			self.dirty = True
+			return (entry["name"], entry["encodings"])
+
+		return None
+
+	def store(self, imagePath, name, encodings):
+		st = os.stat(imagePath)
+		self.entries[imagePath] = {"stat": (st.st_size, st.st_mtime_ns),
+			"size": st.st_size, "digest": file_digest(imagePath),
+			"name": name, "encodings": encodings}
+		self.dirty = True
+
+	def prune(self, imagePaths):
+		# drop the entries of images that no longer exist
+		keep = set(imagePaths)
+		stale = [p for p in self.entries if p not in keep]
+		for p in stale:
+			del self.entries[p]
+		self.dirty = self.dirty or len(stale) > 0
+
+		return len(stale)
+
+	def save(self):
+		# write the cache atomically when something changed
+		if not self.path or not self.dirty:
+			return
+
+		with atomic_write(self.path) as f:
+			pickle.dump(self.entries, f)
+		self.dirty = False
@@ -0,0 +1,118 @@
+# import the necessary packages
+from .cache import EncodingCache
+from .store import EncodingStore
+from .metadata import read_face_metadata
+from concurrent.futures import ProcessPoolExecutor
+from imutils import paths
+import face_recognition
+import numpy as np
+import cv2
+import os
+
+def encoder_input(rgb):
+	# the encoder runs on a 3-channel grayscale copy of the image, the
+	# enrollment selector prepares its frames the same way so its
+	# embeddings match the ones encoded from the saved crops
+	gray_image = cv2.cvtColor(rgb, cv2.COLOR_BGR2GRAY)
+
+	return np.expand_dims(gray_image, axis=2).repeat(3, axis=2)
+
+def encode_image(imagePath):
+	# extract the person name from the image path
+	name = imagePath.split(os.path.sep)[-2]
+
+	# load the image and convert it to a 3-channel grayscale image
+	image = cv2.imread(imagePath)
+	if image is None:
+		return (imagePath, name, [])
+
+	rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+	gray_img = encoder_input(rgb)
+
+	# reuse the face box recorded at enrollment so the detector does not
+	# run again, images without metadata fall back to detection
+	box = read_face_metadata(imagePath, image.shape)
+	knownLocations = [box] if box is not None else None
+
+	# compute the 128-d encodings of every face in it
+	encodings = face_recognition.face_encodings(gray_img, knownLocations)
+
+	return (imagePath, name, encodings)
+
+def encode_chunk(imagePaths):
+	# worker entry point, a whole chunk is encoded per task to keep the
+	# inter-process overhead low
+	return [encode_image(p) for p in imagePaths]
+
+def encode_images(imagePaths, jobs=0, chunk_size=8, progress=None):
+	# encode the images, in parallel across `jobs` processes (0 uses every
+	# core, 1 stays in this process), the results are returned in the
+	# order of `imagePaths` no matter which worker finished first
+	total = len(imagePaths)
+	jobs = jobs or os.cpu_count() or 1
+	results = []
+
+	if jobs == 1 or total <= chunk_size:
+		for (i, p) in enumerate(imagePaths):
+			results.append(encode_image(p))
+			if progress is not None:
+				progress(i + 1, total)
+
+		return results
+
+	chunks = [imagePaths[i:i + chunk_size] for i in range(0, total,
+		chunk_size)]
+	with ProcessPoolExecutor(max_workers=jobs) as executor:
+		# map() yields the chunks in submission order, which makes the
+		# merged output deterministic
+		for chunk in executor.map(encode_chunk, chunks):
+			results.extend(chunk)
+			if progress is not None:
+				progress(len(results), total)
+
+	return results
+
+def encode_dataset(conf, jobs=None, progress=None):
+	# grab the image paths of the class
+	dataset_path = os.path.join(conf["dataset_path"], conf["class"])
+	imagePaths = sorted(paths.list_images(dataset_path))
+	jobs = conf["encode_jobs"] if jobs is None else jobs
+
+	# only encode the images that are new or changed since the last run
+	# and forget the images that were deleted
+	cache = EncodingCache(conf["encoding_cache_path"])
+	cache.prune(imagePaths)
+	cached = {}
+	for p in imagePaths:
+		hit = cache.lookup(p)
+		if hit is not None:
+			cached[p] = hit
+	missing = [p for p in imagePaths if p not in cached]
+
+	def report(done, total):
+		if progress is not None:
+			progress(len(cached) + done, len(imagePaths))
+
+	for (p, name, encodings) in encode_images(missing, jobs=jobs or 0,
+		progress=report):
+		cache.store(p, name, encodings)
+		cached[p] = (name, encodings)
+	cache.save()
+
+	# flatten the per-image results into the rows of the store
+	knownEncodings = []
+	knownNames = []
+	knownPaths = []
+	for p in imagePaths:
+		(name, encodings) = cached[p]
+		for encoding in encodings:
+			knownEncodings.append(encoding)
+			knownNames.append(name)
+			knownPaths.append(p)
+
+	# write the encodings store
+	store = EncodingStore()
+	store.append(knownEncodings, knownNames, knownPaths)
+	store.save(conf["encodings_path"])
+
+	return (len(imagePaths), len(knownEncodings))
@@ -0,0 +1,41 @@
+# import the necessary packages
+import json
+import os
+
+def metadata_path(imagePath):
+	# the metadata of `dataset/.../00000.png` lives in `.../00000.json`
+	return "{}.json".format(os.path.splitext(imagePath)[0])
+
+def write_face_metadata(imagePath, box, shape):
+	# record the (top, right, bottom, left) face box in the coordinates
+	# of the saved image, together with the image size
+	(h, w) = shape[:2]
+	(top, right, bottom, left) = box
+	meta = {"box": [int(top), int(right), int(bottom), int(left)],
+		"size": [int(w), int(h)]}
+
+	with open(metadata_path(imagePath), "w") as f:
+		json.dump(meta, f)
+
+def read_face_metadata(imagePath, shape=None):
+	# return the recorded face box of an image or None when there is no
+	# (valid) metadata, a box recorded for a different image size is
+	# ignored
+	try:
+		with open(metadata_path(imagePath), "r") as f:
+			meta = json.load(f)
+	except (FileNotFoundError, ValueError):
+		return None
+
+	if shape is not None and meta.get("size") != [shape[1], shape[0]]:
+		return None
+
+	return tuple(meta["box"])
+
+def crop_box(box, crop):
+	# translate a frame box into the coordinates of a crop given as
+	# (top, right, bottom, left) in the frame
+	(top, right, bottom, left) = box
+	(cTop, cRight, cBottom, cLeft) = crop
+
+	return (top - cTop, right - cLeft, bottom - cTop, left - cLeft)
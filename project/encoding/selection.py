@@ -0,0 +1,88 @@
+# import the necessary packages
+from collections import namedtuple
+from .encoder import encoder_input
+import face_recognition
+import numpy as np
+import cv2
+
+# the outcome of offering a face to the selector: whether it was kept,
+# the reason when it was not, the quality scores and the embedding
+Candidate = namedtuple("Candidate", ["kept", "reason", "sharpness", "size",
+	"distance", "encoding"])
+
+def sharpness(image, box):
+	# variance of the Laplacian over the face, low values mean motion
+	# blur or an out of focus face
+	(top, right, bottom, left) = box
+	face = image[top:bottom, left:right]
+	if face.size == 0:
+		return 0.0
+
+	gray = cv2.cvtColor(face, cv2.COLOR_RGB2GRAY) if face.ndim == 3 \
+		else face
+
+	return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+def largest_box(boxes):
+	# the enrollee is the face closest to the camera
+	return max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+
+class FrameSelector:
+	def __init__(self, target, min_distance=0.12, min_sharpness=50.0,
+		min_face_size=80):
+		# keep up to `target` faces that are sharp enough, large enough
+		# and at least `min_distance` (in embedding space) away from
+		# every face kept so far
+		self.target = target
+		self.minDistance = min_distance
+		self.minSharpness = min_sharpness
+		self.minFaceSize = min_face_size
+		self.encodings = []
+
+	def done(self):
+		return len(self.encodings) >= self.target
+
+	def consider(self, rgb, box):
+		# cheap quality checks first, the embedding is only computed for
+		# faces that pass them
+		(top, right, bottom, left) = box
+		size = min(bottom - top, right - left)
+		if size < self.minFaceSize:
+			return Candidate(False, "small", None, size, None, None)
+
+		score = sharpness(rgb, box)
+		if score < self.minSharpness:
+			return Candidate(False, "blurry", score, size, None, None)
+
+		# encoded like the saved crop will be, the embedding is handed to
+		# the streaming enroller instead of encoding the crop again
+		encodings = face_recognition.face_encodings(encoder_input(rgb),
+			[box])
+		if len(encodings) == 0:
+			return Candidate(False, "no encoding", score, size, None, None)
+
+		# distance to the nearest face already kept, near duplicates of
+		# a kept frame add nothing to the gallery
+		encoding = np.asarray(encodings[0], dtype="float32")
+		distance = None
+		if len(self.encodings) > 0:
+			distance = float(np.linalg.norm(np.array(self.encodings) -
+				encoding, axis=1).min())
+			if distance < self.minDistance:
+				return Candidate(False, "duplicate", score, size, distance,
+					encoding)
+
+		self.encodings.append(encoding)
+
+		return Candidate(True, None, score, size, distance, encoding)
+
+def create_selector(conf):
+	# build the enrollment frame selector from the configuration, None
+	# when every detected face should be saved
+	if not conf["enroll_selection"]:
+		return None
+
+	return FrameSelector(conf["face_count"],
+		min_distance=conf["enroll_min_distance"] or 0.12,
+		min_sharpness=conf["enroll_min_sharpness"] or 0.0,
+		min_face_size=conf["enroll_min_face_size"] or 0)
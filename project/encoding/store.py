@@ -0,0 +1,106 @@
+# import the necessary packages
+from ..utils.atomic import atomic_write
+from contextlib import ExitStack
+import numpy as np
+import pickle
+import os
+
+# file names of the three columns inside the store directory
+COLUMNS = ("encodings", "names", "paths")
+
+class EncodingStore:
+	def __init__(self, encodings=None, names=None, paths=None, path=None):
+		# columnar encodings store: one contiguous float32 N x 128 matrix
+		# plus the label and source image path of every row
+		self.path = path
+		self.encodings = np.zeros((0, 128), dtype="float32") \
+			if encodings is None else encodings
+		self.names = np.zeros(0, dtype="U1") if names is None else names
+		self.paths = np.zeros(0, dtype="U1") if paths is None else paths
+
+	@classmethod
+	def load(cls, path, mmap=True):
+		# load the store, the matrix is memory mapped so opening a large
+		# gallery costs no copy, a missing store is empty
+		if not os.path.isdir(path):
+			return cls(path=path)
+
+		columns = {}
+		for c in COLUMNS:
+			columns[c] = np.load(os.path.join(path, "{}.npy".format(c)),
+				mmap_mode="r" if mmap and c == "encodings" else None,
+				allow_pickle=False)
+
+		if not (len(columns["encodings"]) == len(columns["names"]) ==
+			len(columns["paths"])):
+			raise ValueError("corrupt encodings store: {}".format(path))
+
+		return cls(path=path, **columns)
+
+	@classmethod
+	def from_pickle(cls, picklePath, path=None):
+		# convert the legacy {"encodings": [...], "names": [...]} pickle
+		with open(picklePath, "rb") as f:
+			data = pickle.load(f)
+
+		store = cls(path=path)
+		store.append(data["encodings"], data["names"],
+			[""] * len(data["names"]))
+
+		return store
+
+	def __len__(self):
+		return len(self.names)
+
+	def append(self, encodings, names, paths):
+		# add rows to the store (in memory, call save() to persist)
+		encodings = np.asarray(encodings, dtype="float32").reshape(-1, 128)
+		self.encodings = np.concatenate([self.encodings, encodings])
+		self.names = np.concatenate([self.names, np.asarray(names,
+			dtype=str)])
+		self.paths = np.concatenate([self.paths, np.asarray(paths,
+			dtype=str)])
+
+	def delete(self, name):
+		# remove every row of a person with a single boolean mask and
+		# return the number of removed rows
+		keep = self.names != name
+		removed = int(len(keep) - keep.sum())
+		if removed > 0:
+			self.encodings = self.encodings[keep]
+			self.names = self.names[keep]
+			self.paths = self.paths[keep]
+
+		return removed
+
+	def save(self, path=None):
+		# write every column to a temporary file first and only then
+		# rename them into place
+		path = path or self.path
+		os.makedirs(path, exist_ok=True)
+
+		# copy a memory mapped matrix into memory and drop the map, a
+		# mapped file cannot be replaced on Windows
+		self.encodings = np.array(self.encodings, dtype="float32")
+		columns = {"encodings": self.encodings, "names": self.names,
+			"paths": self.paths}
+
+		with ExitStack() as stack:
+			for c in COLUMNS:
+				f = stack.enter_context(atomic_write(os.path.join(path,
+					"{}.npy".format(c))))
+				np.save(f, columns[c])
+		self.path = path
+
+def open_encoding_store(conf, mmap=True):
+	# open the encodings store, converting the legacy pickle the first
+	# time
+	path = conf["encodings_path"]
+	legacyPath = conf["legacy_encodings_path"]
+
+	if not os.path.isdir(path) and legacyPath and \
+		os.path.exists(legacyPath):
+		print("[INFO] converting {} to {}...".format(legacyPath, path))
+		EncodingStore.from_pickle(legacyPath, path).save()
+
+	return EncodingStore.load(path, mmap=mmap)
@@ -0,0 +1,106 @@
+# import the necessary packages
+from ..models import publish_models
+from ..recognition.training import add_person
+from .encoder import encode_image
+from .cache import EncodingCache
+from .store import open_encoding_store
+import threading
+import queue
+
+class StreamingEnroller:
+	def __init__(self, conf, person_id):
+		# encode the saved face images of one person on a worker thread
+		# while the capture keeps running
+		self.conf = conf
+		self.personID = person_id
+		self.queue = queue.Queue()
+		self.results = []
+		self.errors = []
+		self.thread = None
+
+	def start(self):
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+		return self
+
+	def submit(self, imagePath, encoding=None):
+		# queue a saved image (and its metadata sidecar) for encoding, an
+		# embedding already computed by the frame selector is stored
+		# as is
+		self.queue.put((imagePath, encoding))
+
+	def _run(self):
+		while True:
+			item = self.queue.get()
+			if item is None:
+				break
+
+			(imagePath, encoding) = item
+			if encoding is not None:
+				self.results.append((imagePath, self.personID, [encoding]))
+				continue
+
+			# the same encoder as encode_faces.py, so the rows match a
+			# full re-encode of the dataset
+			try:
+				self.results.append(encode_image(imagePath))
+			except Exception as e:
+				self.errors.append((imagePath, e))
+
+	def encoded(self):
+		# number of images encoded so far
+		return len(self.results)
+
+	def finish(self):
+		# wait for the queued images and return the (path, name,
+		# encodings) results
+		if self.thread is not None:
+			self.queue.put(None)
+			self.thread.join()
+			self.thread = None
+
+		for (imagePath, e) in self.errors:
+			print("[ERROR] failed to encode {}: {}".format(imagePath, e))
+
+		return self.results
+
+	def commit(self, progress=None):
+		# append the encodings to the store and the model and publish a
+		# new version, the running recognizers pick it up on their next
+		# reload check, returns the number of encodings and whether the
+		# model was updated
+		progress = progress or (lambda message: None)
+		results = self.finish()
+		rows = [(p, e) for (p, _, encodings) in results for e in encodings]
+		if len(rows) == 0:
+			raise ValueError("no face could be encoded for {}".format(
+				self.personID))
+
+		with publish_models(self.conf) as staged:
+			progress("adding encodings")
+			store = open_encoding_store(staged)
+			store.delete(self.personID)
+			store.append([e for (_, e) in rows], [self.personID] * len(rows),
+				[p for (p, _) in rows])
+			store.save()
+
+			# the prototype, nearest neighbour and index backends take
+			# the new person incrementally, the SVC would be retrained
+			# from scratch (with probability calibration) on every
+			# enrollment so it is left to train_model.py
+			trained = (self.conf["recognizer_backend"] or "svc") != "svc"
+			if trained:
+				progress("updating model")
+				add_person(staged, store, self.personID,
+					[e for (_, e) in rows])
+
+			progress("publishing model")
+
+		# remember the encodings so the next full encode skips the images
+		cache = EncodingCache(self.conf["encoding_cache_path"])
+		for (imagePath, name, encodings) in results:
+			cache.store(imagePath, name, encodings)
+		cache.save()
+
+		return (len(rows), trained)
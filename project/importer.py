@@ -0,0 +1,255 @@
+# import the necessary packages
+from .encoding import encode_image
+from .encoding import EncodingCache
+from .encoding import open_encoding_store
+from .encoding import write_face_metadata
+from .encoding import crop_box
+from .encoding.selection import largest_box
+from .recognition.training import train
+from .storage import open_students
+from .models import publish_models
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+import face_recognition
+import numpy as np
+import imutils
+import csv
+import cv2
+import os
+
+# a person to import: the student id, the name and the image and video
+# files to take the faces from
+Person = namedtuple("Person", ["id", "name", "media"])
+
+# the per-person import options shared with the worker processes
+ImportOptions = namedtuple("ImportOptions", ["personDir", "detection",
+	"max_images", "video_frames", "augment", "width"])
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+def is_media(path):
+	return path.lower().endswith(IMAGE_EXTS + VIDEO_EXTS)
+
+def read_manifest(manifestPath):
+	# read an "id,name,media" CSV manifest, the media column holds one or
+	# more ";" separated files (relative to the manifest) and several rows
+	# may list the media of the same person
+	baseDir = os.path.dirname(os.path.abspath(manifestPath))
+	people = {}
+
+	with open(manifestPath, newline="", encoding="utf-8") as f:
+		for row in csv.reader(f):
+			if len(row) < 3 or row[0].strip().lower() == "id":
+				continue
+
+			(id, name) = (row[0].strip(), row[1].strip())
+			media = [os.path.join(baseDir, os.path.normpath(m.strip()))
+				for m in row[2].split(";") if m.strip()]
+			person = people.setdefault(id, Person(id, name or id, []))
+			person.media.extend(media)
+
+	return list(people.values())
+
+def scan_tree(src, names=None):
+	# one sub-directory of images and videos per person id
+	names = names or {}
+	people = []
+
+	for id in sorted(os.listdir(src)):
+		personDir = os.path.join(src, id)
+		if not os.path.isdir(personDir):
+			continue
+
+		media = sorted(os.path.join(personDir, f) for f in
+			os.listdir(personDir) if is_media(f))
+		people.append(Person(id, names.get(id, id), media))
+
+	return people
+
+def augment(image):
+	# the variants of a still image: the original, mirrored, darker,
+	# brighter and slightly rotated copies
+	(h, w) = image.shape[:2]
+	variants = [image, cv2.flip(image, 1),
+		cv2.convertScaleAbs(image, alpha=0.7, beta=0),
+		cv2.convertScaleAbs(image, alpha=1.2, beta=20)]
+
+	for angle in (-10, 10):
+		M = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+		variants.append(cv2.warpAffine(image, M, (w, h),
+			borderMode=cv2.BORDER_REPLICATE))
+
+	return variants
+
+def sample_video(videoPath, count):
+	# `count` frames spread evenly over the clip, clips whose length is
+	# unknown are read sequentially
+	vs = cv2.VideoCapture(videoPath)
+	frames = []
+
+	try:
+		total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+		if total > 0:
+			for idx in np.linspace(0, total - 1, min(count, total)).astype(int):
+				vs.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+				(ret, frame) = vs.read()
+				if ret:
+					frames.append(frame)
+
+			return frames
+
+		while len(frames) < count:
+			(ret, frame) = vs.read()
+			if not ret:
+				break
+			frames.append(frame)
+	finally:
+		vs.release()
+
+	return frames
+
+def load_frames(mediaPath, options):
+	# yield the (label, frame) pairs of a media file
+	stem = os.path.splitext(os.path.basename(mediaPath))[0]
+
+	if mediaPath.lower().endswith(VIDEO_EXTS):
+		for (i, frame) in enumerate(sample_video(mediaPath,
+			options.video_frames)):
+			yield ("{}_f{}".format(stem, i), frame)
+		return
+
+	image = cv2.imread(mediaPath)
+	if image is None:
+		return
+
+	variants = augment(image) if options.augment else [image]
+	for (i, variant) in enumerate(variants):
+		yield ("{}_a{}".format(stem, i), variant)
+
+def import_person(person, options):
+	# detect the person's face in every frame of their media, save the
+	# padded crops (with their face box) to the dataset and encode them,
+	# returns the (path, name, encodings) of every saved image
+	os.makedirs(options.personDir, exist_ok=True)
+	results = []
+
+	for mediaPath in person.media:
+		for (label, frame) in load_frames(mediaPath, options):
+			if len(results) >= options.max_images:
+				return results
+
+			# resize large frames so the detection stays fast
+			if frame.shape[1] > options.width:
+				frame = imutils.resize(frame, width=options.width)
+
+			rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+			boxes = face_recognition.face_locations(rgb,
+				model=options.detection)
+			if len(boxes) == 0:
+				continue
+
+			# the imported person is the largest face, crop it with a
+			# margin proportional to the face size
+			box = largest_box(boxes)
+			(top, right, bottom, left) = box
+			pad = int(0.3 * max(bottom - top, right - left))
+			crop = (max(0, top - pad), min(frame.shape[1], right + pad),
+				min(frame.shape[0], bottom + pad), max(0, left - pad))
+			face = frame[crop[0]:crop[2], crop[3]:crop[1]]
+
+			p = os.path.join(options.personDir, "{}_{}.png".format(
+				str(len(results)).zfill(5), label))
+			cv2.imwrite(p, face)
+			write_face_metadata(p, crop_box(box, crop), face.shape)
+
+			# encode the saved crop exactly like encode_faces.py would
+			results.append(encode_image(p))
+
+	return results
+
+def import_worker(args):
+	# process pool entry point
+	(person, options) = args
+	try:
+		return (person, import_person(person, options), None)
+	except Exception as e:
+		return (person, [], str(e))
+
+def bulk_import(conf, people, jobs=0, video_frames=10, augment=True,
+	train_model=True, progress=None):
+	# import every new person in parallel (one person per task), then
+	# write the student records, the encodings store and the model in
+	# one go, returns {id: number of encodings}
+	students = open_students(conf)
+	todo = []
+	for person in people:
+		if person.id in students:
+			print("[INFO] {} is already enrolled, skipping...".format(
+				person.id))
+			continue
+		todo.append((person, ImportOptions(
+			os.path.join(conf["dataset_path"], conf["class"], person.id),
+			conf["detection_method"], conf["face_count"] or 30,
+			video_frames, augment, 800)))
+
+	if len(todo) == 0:
+		return {}
+
+	# process the people across the cores, map() keeps the input order
+	jobs = jobs or os.cpu_count() or 1
+	executor = None
+	if jobs > 1 and len(todo) > 1:
+		executor = ProcessPoolExecutor(max_workers=min(jobs, len(todo)))
+	imported = []
+
+	try:
+		outputs = executor.map(import_worker, todo) if executor else \
+			map(import_worker, todo)
+		for (i, (person, results, error)) in enumerate(outputs):
+			faces = sum(len(e) for (_, _, e) in results)
+			if error is not None or faces == 0:
+				print("[ERROR] no face imported for {}: {}".format(
+					person.id, error or "no face detected"))
+			else:
+				imported.append((person, results))
+
+			if progress is not None:
+				progress(i + 1, len(todo))
+	finally:
+		if executor is not None:
+			executor.shutdown()
+
+	if len(imported) == 0:
+		return {}
+
+	# insert the student records
+	for (person, _) in imported:
+		students.add(person.id, person.name, cls=conf["class"])
+
+	# append every encoding to the store and publish it with the model
+	rows = [(p, name, e) for (_, results) in imported
+		for (p, name, encodings) in results for e in encodings]
+	with publish_models(conf) as staged:
+		store = open_encoding_store(staged)
+		store.append([e for (_, _, e) in rows], [n for (_, n, _) in rows],
+			[p for (p, _, _) in rows])
+		store.save()
+
+		# the SVC cannot be trained on a single person, the encodings
+		# are published anyway
+		if train_model:
+			try:
+				train(staged, store)
+			except ValueError as e:
+				print("[ERROR] could not train the model: {}".format(e))
+
+	# remember the encodings so the next full encode skips the images
+	cache = EncodingCache(conf["encoding_cache_path"])
+	for (_, results) in imported:
+		for (p, name, encodings) in results:
+			cache.store(p, name, encodings)
+	cache.save()
+
+	return {person.id: sum(len(e) for (_, _, e) in results)
+		for (person, results) in imported}
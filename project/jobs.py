@@ -0,0 +1,65 @@
+# import the necessary packages
+import threading
+import traceback
+import queue
+
+class Job:
+	def __init__(self, name, fn, args, kwargs):
+		# a unit of background work, `status` moves from "queued" to
+		# "running" and then to "done" or "failed"
+		self.name = name
+		self.fn = fn
+		self.args = args
+		self.kwargs = kwargs
+		self.status = "queued"
+		self.message = "queued"
+		self.result = None
+		self.error = None
+		self.finished = threading.Event()
+
+	def progress(self, message):
+		# called by the job function to report what it is doing
+		self.message = message
+
+	def done(self):
+		return self.finished.is_set()
+
+class JobRunner:
+	def __init__(self):
+		# maintenance jobs touch the same files, so they run one at a time
+		# on a single worker thread
+		self.queue = queue.Queue()
+		self.thread = None
+		self.lock = threading.Lock()
+
+	def submit(self, name, fn, *args, **kwargs):
+		# queue `fn(*args, progress=job.progress, **kwargs)` and return
+		# the job so the caller can poll it
+		job = Job(name, fn, args, kwargs)
+		self.queue.put(job)
+
+		with self.lock:
+			if self.thread is None:
+				self.thread = threading.Thread(target=self._run, daemon=True)
+				self.thread.start()
+
+		return job
+
+	def _run(self):
+		while True:
+			job = self.queue.get()
+			job.status = "running"
+			job.message = "running"
+
+			try:
+				job.result = job.fn(*job.args, progress=job.progress,
+					**job.kwargs)
+				job.status = "done"
+				job.message = "done"
+			except Exception as e:
+				traceback.print_exc()
+				job.error = e
+				job.status = "failed"
+				job.message = "failed: {}".format(e)
+			finally:
+				job.finished.set()
@@ -0,0 +1,89 @@
+# import the necessary packages
+from .attendance import open_attendance_log
+from .encoding import open_encoding_store
+from .recognition.training import remove_person
+from .storage import open_students
+from .models import publish_models
+from imutils import paths
+import shutil
+import os
+
+def delete_person(conf, person_id, log=None, students=None, progress=None):
+	# remove a person from the student table, the dataset, the attendance
+	# log, the encodings store and the model, returns None when the
+	# person is not enrolled
+	progress = progress or (lambda message: None)
+	students = students or open_students(conf)
+	if person_id not in students:
+		return None
+
+	# the encodings and the model are rebuilt in a staging version and
+	# published together, a crash leaves the previous version in use
+	with publish_models(conf) as staged:
+		# delete every encoding of the person
+		progress("deleting encodings")
+		store = open_encoding_store(staged)
+		removedEncodings = store.delete(person_id)
+		if removedEncodings > 0:
+			store.save()
+
+		# update the model, the SVC cannot be trained on a single person
+		progress("updating model")
+		trained = True
+		try:
+			remove_person(staged, store, person_id)
+		except ValueError as e:
+			print("[ERROR] could not update the model: {}".format(e))
+			trained = False
+
+		progress("publishing model")
+
+	# delete the face images of the person
+	progress("deleting images")
+	personPath = os.path.join(conf["dataset_path"], conf["class"], person_id)
+	if os.path.isdir(personPath):
+		shutil.rmtree(personPath)
+
+	# delete the attendance data of the person
+	progress("deleting attendance")
+	log = log or open_attendance_log(conf)
+	removedAttendance = log.delete(person_id)
+
+	# remove the student record
+	students.delete(person_id)
+
+	return {"attendance": removedAttendance, "encodings": removedEncodings,
+		"trained": trained}
+
+def import_people(conf, src, names=None):
+	# copy `src/<id>/*` images into the dataset and enroll every new id,
+	# `names` optionally maps ids to student names
+	names = names or {}
+	students = open_students(conf)
+	imported = {}
+
+	for person_id in sorted(os.listdir(src)):
+		personSrc = os.path.join(src, person_id)
+		if not os.path.isdir(personSrc):
+			continue
+
+		if person_id in students:
+			print("[INFO] {} is already enrolled, skipping...".format(
+				person_id))
+			continue
+
+		# copy the images into the dataset
+		personPath = os.path.join(conf["dataset_path"], conf["class"],
+			person_id)
+		os.makedirs(personPath, exist_ok=True)
+		imagePaths = sorted(paths.list_images(personSrc))
+		for (i, imagePath) in enumerate(imagePaths):
+			ext = os.path.splitext(imagePath)[1]
+			shutil.copyfile(imagePath, os.path.join(personPath,
+				"{}{}".format(str(i).zfill(5), ext)))
+
+		students.add(person_id, names.get(person_id, person_id),
+			cls=conf["class"])
+		imported[person_id] = len(imagePaths)
+
+	return imported
@@ -0,0 +1,193 @@
+# import the necessary packages
+from .utils.atomic import atomic_write
+from contextlib import contextmanager
+from datetime import datetime
+import shutil
+import uuid
+import copy
+import time
+import os
+
+# advisory file locks, fcntl on POSIX and msvcrt on Windows
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+# configuration keys of the artifacts that make up a model version, they
+# are always published together
+ARTIFACTS = ("encodings_path", "recognizer_path", "le_path",
+	"prototype_path", "index_path")
+
+# name of the pointer file holding the current version
+POINTER = "CURRENT"
+
+# name of the lock file serializing the writers
+LOCK = "LOCK"
+
+def version_conf(conf, versionDir):
+	# copy of the configuration whose artifact paths point into a version
+	# directory
+	conf = copy.copy(conf)
+	conf.__dict__ = dict(conf.__dict__)
+	for key in ARTIFACTS:
+		if conf[key]:
+			conf.__dict__[key] = os.path.join(versionDir,
+				os.path.basename(conf[key].rstrip("/\\")))
+	conf.__dict__["model_version_dir"] = versionDir
+
+	return conf
+
+def link_or_copy(src, dst):
+	# hard link an artifact into the staging directory (writers always
+	# replace files, never write into them) and fall back to a copy
+	if os.path.isdir(src):
+		os.makedirs(dst, exist_ok=True)
+		for name in os.listdir(src):
+			link_or_copy(os.path.join(src, name), os.path.join(dst, name))
+		return
+
+	try:
+		os.link(src, dst)
+	except OSError:
+		shutil.copy2(src, dst)
+
+@contextmanager
+def file_lock(path):
+	# hold an exclusive lock on `path` for the duration of the block, the
+	# operating system drops it when the process dies so a crash never
+	# leaves a stale lock behind
+	with open(path, "a+") as f:
+		if fcntl is not None:
+			fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+		else:
+			# LK_LOCK gives up after about 10 seconds, keep waiting
+			while True:
+				try:
+					f.seek(0)
+					msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+					break
+				except OSError:
+					time.sleep(0.1)
+
+		try:
+			yield
+		finally:
+			if fcntl is not None:
+				fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+			else:
+				f.seek(0)
+				msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class ModelRepository:
+	def __init__(self, root, keep=3):
+		# every published version lives in `root/<version>` and the
+		# `root/CURRENT` pointer names the one in use
+		self.root = root
+		self.keep = keep
+
+	def current_version(self):
+		try:
+			with open(os.path.join(self.root, POINTER), "r") as f:
+				version = f.read().strip()
+		except FileNotFoundError:
+			return None
+
+		return version or None
+
+	def resolve(self, conf):
+		# configuration pointing at the current version, or the flat
+		# legacy paths when nothing was published yet
+		version = self.current_version()
+		if version is None:
+			return conf
+
+		return version_conf(conf, os.path.join(self.root, version))
+
+	@contextmanager
+	def stage(self, conf):
+		# create a staging directory seeded with the current artifacts
+		# and yield a configuration pointing into it, the version is only
+		# published when the block completes, writers (an enrollment, a
+		# delete job, a retrain, in this or another process) hold the
+		# repository lock from seeding to publishing so none of them
+		# builds on a version another one is about to replace
+		with file_lock(os.path.join(self.root, LOCK)):
+			version = "{}-{}".format(datetime.now().strftime(
+				"%Y%m%d-%H%M%S-%f"), uuid.uuid4().hex[:6])
+			stagingDir = os.path.join(self.root, "{}.staging".format(
+				version))
+			os.makedirs(stagingDir)
+			current = self.resolve(conf)
+			staged = version_conf(conf, stagingDir)
+
+			try:
+				for key in ARTIFACTS:
+					if current[key] and os.path.exists(current[key]):
+						link_or_copy(current[key], staged[key])
+
+				yield staged
+			except BaseException:
+				shutil.rmtree(stagingDir, ignore_errors=True)
+				raise
+
+			self.publish(stagingDir, version)
+
+	def publish(self, stagingDir, version):
+		# rename the staging directory into place and swap the pointer
+		# with an atomic replace, readers see either the old or the new
+		# version as a whole
+		os.rename(stagingDir, os.path.join(self.root, version))
+		with atomic_write(os.path.join(self.root, POINTER), "w") as f:
+			f.write(version)
+		self.prune()
+
+	def versions(self):
+		# published versions, oldest first (names sort by time)
+		return sorted(d for d in os.listdir(self.root)
+			if os.path.isdir(os.path.join(self.root, d)) and
+			not d.endswith(".staging"))
+
+	def prune(self):
+		# keep the current version and the `keep` most recent ones, the
+		# caller holds the repository lock so every staging directory
+		# left is an orphan of a writer that died (a job thread killed
+		# with its window) and is removed too
+		current = self.current_version()
+		for version in self.versions()[:-self.keep]:
+			if version != current:
+				shutil.rmtree(os.path.join(self.root, version),
+					ignore_errors=True)
+
+		for name in os.listdir(self.root):
+			path = os.path.join(self.root, name)
+			if name.endswith(".staging") and os.path.isdir(path):
+				shutil.rmtree(path, ignore_errors=True)
+
+def model_repository(conf):
+	# the repository configured by "model_dir" (None keeps the flat
+	# output/ layout)
+	if not conf["model_dir"]:
+		return None
+
+	return ModelRepository(conf["model_dir"], keep=conf["model_keep"] or 3)
+
+def resolve_models(conf):
+	# configuration pointing at the artifacts currently in use
+	repo = model_repository(conf)
+
+	return repo.resolve(conf) if repo is not None else conf
+
+@contextmanager
+def publish_models(conf):
+	# stage new artifacts and publish them atomically, without a model
+	# directory the artifacts are written in place
+	repo = model_repository(conf)
+	if repo is None:
+		yield conf
+		return
+
+	os.makedirs(repo.root, exist_ok=True)
+	with repo.stage(conf) as staged:
+		yield staged
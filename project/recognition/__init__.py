@@ -0,0 +1,12 @@
+# import the necessary packages
+from .engine import FaceAttendanceEngine
+from .engine import Recognition
+from .engine import FrameResult
+from .sources import FrameSource
+from .pipeline import RecognitionPipeline
+from .recognizers import SVCRecognizer
+from .recognizers import NearestNeighborRecognizer
+from .recognizers import load_recognizer
+from .recognizers import IndexRecognizer
+from .index import EmbeddingIndex
+from .recognizers import PrototypeRecognizer
@@ -0,0 +1,278 @@
+# import the necessary packages
+from collections import namedtuple
+from ..attendance import AttendanceLedger
+from ..attendance import open_attendance_log
+from ..storage import open_students
+from ..models import resolve_models
+from ..utils.metrics import create_metrics
+from .sources import FrameSource
+from .tracker import FaceTracker
+from .recognizers import SVCRecognizer
+from .recognizers import load_recognizer
+from .reloader import ModelWatcher
+import face_recognition
+import threading
+import cv2
+
+# a single classified face: the (top, right, bottom, left) box, the
+# predicted student id, the student name, the classifier confidence, the
+# track id (None outside tracking mode) and the number of consecutive
+# frames the face has carried this identity
+Recognition = namedtuple("Recognition", ["box", "id", "name", "probability",
+	"track", "streak"])
+
+# everything the engine produced for one frame, `status` is the human
+# readable attendance message the Tk window shows
+FrameResult = namedtuple("FrameResult", ["frame", "boxes", "recognitions",
+	"events", "status"])
+
+def scale_box(box, factor, shape):
+	# scale a (top, right, bottom, left) box and clip it to the frame
+	(top, right, bottom, left) = box
+	(h, w) = shape[:2]
+
+	return (max(0, int(round(top * factor))),
+		min(w, int(round(right * factor))),
+		min(h, int(round(bottom * factor))),
+		max(0, int(round(left * factor))))
+
+class FaceAttendanceEngine:
+	def __init__(self, conf, recognizer=None, le=None):
+		# store the configuration and load the recognizer backend from
+		# the configuration unless a trained SVC and label encoder were
+		# supplied by the caller
+		self.conf = conf
+		self.watcher = None
+
+		# per-stage latency metrics of the hot path, a no-op stand-in
+		# when disabled
+		(self.metrics, self.exporter) = create_metrics(conf)
+
+		if recognizer is not None:
+			self.recognizer = SVCRecognizer(recognizer, le)
+		else:
+			self.recognizer = load_recognizer(resolve_models(conf))
+
+			# watch for newly published models and swap them in while
+			# the recognition keeps running
+			interval = conf["model_reload_interval"]
+			if interval:
+				self.watcher = ModelWatcher(conf, self.swap_recognizer,
+					interval=interval).start()
+
+		# initialize the student repository and the in-memory
+		# attendance ledger, which flushes new events to disk in the
+		# background
+		self.students = open_students(conf)
+		self.ledger = AttendanceLedger(open_attendance_log(conf),
+			flush_interval=conf["attendance_flush_interval"] or 5.0).start()
+
+		# faces are detected on a frame resized by this factor and then
+		# encoded on the full resolution frame
+		self.detectionScale = float(conf["detection_scale"] or 1.0)
+
+		# initialize the per-face consecutive recognition streaks, keyed
+		# by student id outside tracking mode, and the number of
+		# consecutive classifications required before the attendance is
+		# committed, the lock serializes commits when several inference
+		# workers share the engine
+		self.streaks = {}
+		self.consecCount = int(conf["consec_count"] or 0)
+		self.lock = threading.Lock()
+
+		# in tracking mode the full detection and encoding only run every
+		# few frames, in between the boxes follow a lightweight tracker,
+		# a track keeps being classified at every detection until
+		# `consec_count` + 1 classifications (at least two) agreed on its
+		# identity
+		self.tracker = None
+		self.trackLock = threading.Lock()
+		if conf["tracking"]:
+			self.tracker = FaceTracker(self.detect, self.classify,
+				detect_every=conf["detect_every"] or 5,
+				tracker=conf["tracker"] or "mil",
+				iou_threshold=conf["track_iou"] or 0.3,
+				max_misses=conf["track_max_misses"] or 2,
+				min_probability=conf["track_min_probability"] or 0.0,
+				confirm_count=max(2, self.consecCount + 1))
+
+	def swap_recognizer(self, recognizer, version=None):
+		# replace the recognizer between frames, classify() reads the
+		# attribute once per call so a frame never mixes two models
+		self.recognizer = recognizer
+
+		# tracked faces are classified again against the new model
+		if self.tracker is not None:
+			with self.trackLock:
+				for t in self.tracker.tracks:
+					t.reset()
+
+		print("[INFO] switched to model version {}".format(version))
+
+	def lookup_name(self, id):
+		# grab the name of the student from the cached index
+		return self.students.get(id)
+
+	def store_attendance(self, name, id):
+		# unrecognized faces never produce an attendance record
+		if not name or name.lower() == "unknown":
+			return (None, None)
+
+		event = self.ledger.mark(id, name)
+		if event is None:
+			return (None, f"Attendance for {name} (ID: {id}) already "
+				"recorded for today.")
+
+		print(f"Stored attendance for {name} (ID: {id}) at {event.date_time}")
+
+		return (event, None)
+
+	def detect(self, frame):
+		# convert the frame from BGR (OpenCV ordering) to RGB, the full
+		# resolution RGB frame is kept for the encoder
+		metrics = self.metrics
+		with metrics.stage("color"):
+			rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+		scale = self.detectionScale
+
+		# HOG cost grows with the pixel count, so detect on a downscaled
+		# copy when configured and map the boxes back to the full frame
+		with metrics.stage("detect"):
+			if scale == 1.0:
+				small = rgb
+			else:
+				small = cv2.resize(rgb, (0, 0), fx=scale, fy=scale,
+					interpolation=cv2.INTER_AREA)
+
+			boxes = face_recognition.face_locations(small,
+				model=self.conf["detection_method"])
+
+		if scale != 1.0:
+			boxes = [scale_box(box, 1.0 / scale, rgb.shape) for box in boxes]
+
+		return (rgb, boxes)
+
+	def classify(self, rgb, boxes):
+		# compute the embeddings for the boxes and classify them in one
+		# batch, returning an (id, probability) pair per box
+		recognizer = self.recognizer
+		with self.metrics.stage("encode"):
+			encodings = face_recognition.face_encodings(rgb, boxes)
+
+		with self.metrics.stage("classify"):
+			return recognizer.predict(encodings)
+
+	def analyze(self, frame):
+		# the tracker holds per-track state, so tracking frames are
+		# processed one at a time
+		if self.tracker is not None:
+			with self.trackLock, self.metrics.stage("track"):
+				tracks = self.tracker.update(frame)
+				boxes = [t.box for t in tracks]
+
+				# only the faces found by the latest detection are
+				# reported, the streak counts the agreeing
+				# classifications of the track so tracked frames alone
+				# never verify an identity
+				recognitions = [Recognition(t.box, t.id, None,
+					t.probability, t.trackID, t.votes - 1) for t in tracks
+					if t.id is not None and t.misses == 0]
+
+			return (boxes, recognitions)
+
+		# detect the faces in the frame, this step holds no engine state
+		# so it is safe to run from several worker threads at once
+		(rgb, boxes) = self.detect(frame)
+		recognitions = []
+
+		if len(boxes) > 0:
+			# classify every face in a single batched call
+			preds = self.classify(rgb, boxes)
+			recognitions = [Recognition(box, id, None, prob, None, 0)
+				for (box, (id, prob)) in zip(boxes, preds)]
+
+		return (boxes, recognitions)
+
+	def update_streaks(self, recognitions):
+		# extend the streak of every face that kept its identity since
+		# the previous frame, faces that disappeared lose their streak
+		streaks = {}
+		updated = []
+
+		for r in recognitions:
+			# a track counts its own agreeing classifications
+			if r.track is not None:
+				updated.append(r)
+				continue
+
+			key = r.id
+			(prevID, count) = self.streaks.get(key, (None, -1))
+			count = count + 1 if prevID == r.id else 0
+			streaks[key] = (r.id, count)
+			updated.append(r._replace(streak=count))
+
+		self.streaks = streaks
+
+		return updated
+
+	def commit(self, frame, boxes, recognitions):
+		# update the consecutive counts, look up the students and mark
+		# the attendance of every face whose streak is long enough
+		with self.lock:
+			named = []
+			events = []
+			messages = []
+
+			for r in self.update_streaks(recognitions):
+				with self.metrics.stage("lookup"):
+					name = self.lookup_name(r.id)
+				named.append(r._replace(name=name))
+
+				if r.streak < self.consecCount:
+					messages.append(f"{name} (verifying)")
+					continue
+
+				with self.metrics.stage("attendance"):
+					(event, attn_info) = self.store_attendance(name, r.id)
+
+				if event is not None:
+					events.append(event)
+
+				messages.append(attn_info if attn_info else name)
+
+			status = "; ".join(messages) if len(messages) > 0 else None
+
+		return FrameResult(frame, boxes, named, events, status)
+
+	def process_frame(self, frame):
+		# analyze the frame and commit the recognitions
+		with self.metrics.stage("frame"):
+			(boxes, recognitions) = self.analyze(frame)
+			result = self.commit(frame, boxes, recognitions)
+
+		self.metrics.tick()
+
+		return result
+
+	def run(self, source, max_frames=None):
+		# wrap anything that is not already a frame source (camera index,
+		# video file, image directory or an iterable of frames)
+		if not isinstance(source, FrameSource):
+			source = FrameSource(source)
+
+		try:
+			for (i, frame) in enumerate(source):
+				if max_frames is not None and i >= max_frames:
+					break
+				yield self.process_frame(frame)
+		finally:
+			source.release()
+
+	def close(self):
+		# stop watching for new models, write the final metrics and flush
+		# the pending attendance
+		if self.watcher is not None:
+			self.watcher.stop()
+		if self.exporter is not None:
+			self.exporter.stop()
+		self.ledger.close()
@@ -0,0 +1,193 @@
+# import the necessary packages
+from ..utils.atomic import atomic_write
+import numpy as np
+
+def squared_distances(q, qNorms, block, blockNorms):
+	# squared euclidean distances between the queries and a block of the
+	# gallery, ||a||^2 + ||b||^2 - 2ab turns the work into one BLAS
+	# matrix product
+	d = qNorms[:, None] + blockNorms[None, :] - 2.0 * (q @ block.T)
+
+	return np.maximum(d, 0.0, out=d)
+
+def block_topk(d, k):
+	# indices and distances of the k smallest entries of every row
+	if k == 1:
+		i = np.argmin(d, axis=1)[:, None]
+	elif d.shape[1] > k:
+		i = np.argpartition(d, k - 1, axis=1)[:, :k]
+	else:
+		i = np.broadcast_to(np.arange(d.shape[1]), d.shape)
+
+	return (np.take_along_axis(d, i, axis=1), i)
+
+def merge_topk(bestD, bestI, d, offset, k):
+	# reduce a new block to its own top-k first, then merge it into the
+	# running top-k
+	(blockD, blockI) = block_topk(d, k)
+	allD = np.concatenate([bestD, blockD], axis=1)
+	allI = np.concatenate([bestI, blockI + offset], axis=1)
+	(allD, i) = block_topk(allD, k)
+
+	return (allD, np.take_along_axis(allI, i, axis=1))
+
+def exact_search(q, matrix, sqNorms, k=1, chunk_size=65536):
+	# brute force k nearest neighbour search, the gallery is processed in
+	# chunks so the distance matrix never exceeds len(q) x chunk_size
+	q = np.ascontiguousarray(q, dtype="float32")
+	qNorms = np.einsum("ij,ij->i", q, q)
+	bestD = np.full((len(q), 0), np.inf, dtype="float32")
+	bestI = np.full((len(q), 0), -1, dtype="int64")
+
+	for start in range(0, len(matrix), chunk_size):
+		end = start + chunk_size
+		d = squared_distances(q, qNorms, matrix[start:end],
+			sqNorms[start:end])
+		(bestD, bestI) = merge_topk(bestD, bestI, d, start, k)
+
+	# sort the top-k of every query by distance
+	order = np.argsort(bestD, axis=1)
+	bestD = np.take_along_axis(bestD, order, axis=1)
+	bestI = np.take_along_axis(bestI, order, axis=1)
+
+	return (np.sqrt(bestD), bestI)
+
+def kmeans(data, k, iters=20, seed=42, chunk_size=65536):
+	# plain Lloyd's k-means, the centroids start from a random sample of
+	# the data and empty clusters are re-seeded from random points
+	rng = np.random.RandomState(seed)
+	centroids = data[rng.choice(len(data), k, replace=False)].copy()
+
+	for _ in range(iters):
+		norms = np.einsum("ij,ij->i", centroids, centroids)
+		(_, assign) = exact_search(data, centroids, norms, k=1,
+			chunk_size=chunk_size)
+		assign = assign[:, 0]
+
+		# sum the members of every cluster with one reduceat over the
+		# rows sorted by cluster
+		order = np.argsort(assign, kind="stable")
+		counts = np.bincount(assign, minlength=k)
+		starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+		full = counts > 0
+		centroids[full] = np.add.reduceat(data[order], starts[full],
+			axis=0) / counts[full][:, None].astype("float32")
+
+		empty = ~full
+		centroids[empty] = data[rng.choice(len(data), int(empty.sum()))]
+
+	return centroids.astype("float32")
+
+class EmbeddingIndex:
+	def __init__(self, matrix, labels, kind="exact", nlist=0, nprobe=8,
+		chunk_size=65536):
+		# `kind` is either "exact" (chunked brute force) or "ivf"
+		# (k-means partitions, only the `nprobe` closest partitions are
+		# scanned per query)
+		self.kind = kind
+		self.nprobe = nprobe
+		self.chunkSize = chunk_size
+		self.matrix = np.ascontiguousarray(matrix, dtype="float32").reshape(
+			-1, 128)
+		self.labels = np.asarray(labels)
+		self.sqNorms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+		self.centroids = None
+		self.offsets = None
+		self.nlist = nlist
+
+	@classmethod
+	def build(cls, encodings, names, kind="exact", nlist=0, nprobe=8,
+		iters=20, sample=256, seed=42, chunk_size=65536):
+		index = cls(encodings, names, kind=kind, nlist=nlist, nprobe=nprobe,
+			chunk_size=chunk_size)
+		if kind == "ivf" and len(index.matrix) > 0:
+			index._train(iters, sample, seed)
+
+		return index
+
+	def _train(self, iters, sample, seed):
+		# default to ~4 * sqrt(n) partitions
+		n = len(self.matrix)
+		nlist = self.nlist or int(4 * np.sqrt(n))
+		nlist = max(1, min(nlist, n))
+		self.nlist = nlist
+
+		# train the centroids on a subsample, then assign every row
+		rng = np.random.RandomState(seed)
+		trainSet = self.matrix
+		if n > nlist * sample:
+			trainSet = self.matrix[rng.choice(n, nlist * sample,
+				replace=False)]
+		self.centroids = kmeans(trainSet, nlist, iters=iters, seed=seed,
+			chunk_size=self.chunkSize)
+		(_, assign) = exact_search(self.matrix, self.centroids,
+			np.einsum("ij,ij->i", self.centroids, self.centroids), k=1,
+			chunk_size=self.chunkSize)
+
+		# store the partitions contiguously: rows sorted by partition
+		# and an offsets array delimiting every inverted list
+		order = np.argsort(assign[:, 0], kind="stable")
+		self.matrix = np.ascontiguousarray(self.matrix[order])
+		self.labels = self.labels[order]
+		self.sqNorms = self.sqNorms[order]
+		counts = np.bincount(assign[:, 0], minlength=nlist)
+		self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(
+			"int64")
+
+	def __len__(self):
+		return len(self.matrix)
+
+	def search(self, queries, k=1, nprobe=None):
+		# return the (distances, labels) of the k nearest gallery entries
+		# for every query
+		q = np.ascontiguousarray(queries, dtype="float32").reshape(-1, 128)
+		if self.kind != "ivf" or self.centroids is None:
+			(d, i) = exact_search(q, self.matrix, self.sqNorms, k=k,
+				chunk_size=self.chunkSize)
+			return (d, self.labels[i])
+
+		# pick the closest partitions of every query
+		nprobe = min(nprobe or self.nprobe, self.nlist)
+		cNorms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+		(_, probes) = exact_search(q, self.centroids, cNorms, k=nprobe)
+
+		dists = np.full((len(q), k), np.inf, dtype="float32")
+		labels = np.empty((len(q), k), dtype=self.labels.dtype)
+		for (qi, lists) in enumerate(probes):
+			# gather the candidate rows of the probed partitions
+			rows = np.concatenate([np.arange(self.offsets[c],
+				self.offsets[c + 1]) for c in lists])
+			if len(rows) == 0:
+				continue
+			(d, i) = exact_search(q[qi:qi + 1], self.matrix[rows],
+				self.sqNorms[rows], k=k, chunk_size=self.chunkSize)
+			n = d.shape[1]
+			dists[qi, :n] = d[0]
+			labels[qi, :n] = self.labels[rows[i[0]]]
+
+		return (dists, labels)
+
+	def save(self, path):
+		# write the index to a single .npz file (through a temporary
+		# file renamed into place)
+		arrays = {"matrix": self.matrix, "labels": self.labels,
+			"kind": np.array(self.kind), "nprobe": np.array(self.nprobe)}
+		if self.centroids is not None:
+			arrays["centroids"] = self.centroids
+			arrays["offsets"] = self.offsets
+		with atomic_write(path) as f:
+			np.savez(f, **arrays)
+
+	@classmethod
+	def load(cls, path, chunk_size=65536):
+		# read an index written by save()
+		with np.load(path, allow_pickle=False) as data:
+			index = cls(data["matrix"], data["labels"],
+				kind=str(data["kind"]), nprobe=int(data["nprobe"]),
+				chunk_size=chunk_size)
+			if "centroids" in data:
+				index.centroids = data["centroids"]
+				index.offsets = data["offsets"]
+				index.nlist = len(index.centroids)
+
+		return index
@@ -0,0 +1,145 @@
+# import the necessary packages
+from .sources import FrameSource
+import threading
+import queue
+
+class RecognitionPipeline:
+	def __init__(self, engine, source, workers=1, queue_size=1):
+		# store the engine and wrap the source if required
+		self.engine = engine
+		self.source = source if isinstance(source, FrameSource) else \
+			FrameSource(source)
+		self.workers = max(1, workers)
+
+		# the bounded queue holds the frames waiting for inference, when
+		# it is full the oldest frame of a live source is dropped so
+		# workers always pick up the freshest frame available, a finite
+		# source waits for room instead so every frame is processed
+		self.queue = queue.Queue(maxsize=max(1, queue_size))
+		self.lock = threading.Lock()
+		self.threads = []
+
+		# `stopped` is only set by stop(), the end of a finite source
+		# sets `exhausted` and the workers drain the queue before they
+		# exit, the last one to exit sets `finished`
+		self.stopped = threading.Event()
+		self.exhausted = threading.Event()
+		self.finished = threading.Event()
+		self.activeWorkers = 0
+
+		# latest captured frame and latest inference result
+		self.frame = None
+		self.frameID = 0
+		self.result = None
+		self.resultID = 0
+
+		# simple counters so callers can report throughput
+		self.captured = 0
+		self.processed = 0
+		self.dropped = 0
+
+	def start(self):
+		# start the capture thread followed by the inference workers
+		self.threads.append(threading.Thread(target=self._capture,
+			daemon=True))
+		self.activeWorkers = self.workers
+		for _ in range(self.workers):
+			self.threads.append(threading.Thread(target=self._infer,
+				daemon=True))
+
+		for t in self.threads:
+			t.start()
+
+		return self
+
+	def _capture(self):
+		# keep reading frames so the camera buffer never goes stale
+		while not self.stopped.is_set():
+			with self.engine.metrics.stage("read"):
+				(ret, frame) = self.source.read()
+			if not ret:
+				self.exhausted.set()
+				break
+
+			with self.lock:
+				self.frameID += 1
+				self.captured += 1
+				self.frame = frame
+				frameID = self.frameID
+
+			self._offer((frameID, frame))
+
+	def _offer(self, item):
+		# a finite source blocks until a worker takes a frame
+		if not self.source.live:
+			while not self.stopped.is_set():
+				try:
+					self.queue.put(item, timeout=0.1)
+					return
+				except queue.Full:
+					pass
+			return
+
+		# push the frame, evicting the stale frame when the queue is full
+		while True:
+			try:
+				self.queue.put_nowait(item)
+				return
+			except queue.Full:
+				try:
+					self.queue.get_nowait()
+					with self.lock:
+						self.dropped += 1
+				except queue.Empty:
+					pass
+
+	def _infer(self):
+		# run the recognition on the queued frames until stop() is called
+		# or the source is exhausted and the queue drained
+		try:
+			self._infer_frames()
+		finally:
+			with self.lock:
+				self.activeWorkers -= 1
+				if self.activeWorkers == 0:
+					self.finished.set()
+
+	def _infer_frames(self):
+		while not self.stopped.is_set():
+			try:
+				(frameID, frame) = self.queue.get(timeout=0.1)
+			except queue.Empty:
+				# the capture thread only sets `exhausted` after its last
+				# frame was queued
+				if self.exhausted.is_set():
+					break
+				continue
+
+			result = self.engine.process_frame(frame)
+
+			# only publish results that are newer than the current one
+			# since several workers may finish out of order
+			with self.lock:
+				self.processed += 1
+				if frameID > self.resultID:
+					self.result = result
+					self.resultID = frameID
+
+	def read(self):
+		# return the latest frame and the latest result for rendering
+		with self.lock:
+			return (self.frameID, self.frame, self.resultID, self.result)
+
+	def running(self):
+		# false once stopped, or once a finite source has been fully
+		# processed
+		return not self.stopped.is_set() and not self.finished.is_set()
+
+	def stop(self):
+		# signal the threads to stop, wait for them and release the source
+		self.stopped.set()
+		for t in self.threads:
+			t.join(timeout=1.0)
+
+		self.threads = []
+		self.source.release()
@@ -0,0 +1,238 @@
+# import the necessary packages
+from ..encoding.store import open_encoding_store
+from .index import EmbeddingIndex
+from ..utils.atomic import atomic_write
+import numpy as np
+import pickle
+import os
+
+# label returned for faces that do not match anybody in the gallery
+UNKNOWN = "unknown"
+
+class SVCRecognizer:
+	def __init__(self, recognizer, le):
+		# wrap the scikit-learn classifier and label encoder produced by
+		# train_model.py
+		self.recognizer = recognizer
+		self.le = le
+
+	@classmethod
+	def load(cls, conf):
+		with open(conf["recognizer_path"], "rb") as f:
+			recognizer = pickle.load(f)
+		with open(conf["le_path"], "rb") as f:
+			le = pickle.load(f)
+
+		return cls(recognizer, le)
+
+	def predict(self, encodings):
+		# return an (id, probability) pair for every encoding
+		if len(encodings) == 0:
+			return []
+
+		preds = self.recognizer.predict_proba(encodings)
+		js = np.argmax(preds, axis=1)
+
+		return [(self.le.classes_[j], float(p[j])) for (p, j) in
+			zip(preds, js)]
+
+class NearestNeighborRecognizer:
+	def __init__(self, encodings, names, threshold=0.5, mode="gallery"):
+		# store the gallery as one contiguous float32 matrix, in
+		# "centroid" mode every person is reduced to the mean of their
+		# encodings
+		encodings = np.asarray(encodings, dtype="float32").reshape(-1, 128)
+		names = np.asarray(names)
+		self.threshold = threshold
+		self.mode = mode
+
+		if mode == "centroid" and len(names) > 0:
+			(labels, inverse) = np.unique(names, return_inverse=True)
+			sums = np.zeros((len(labels), encodings.shape[1]),
+				dtype="float32")
+			np.add.at(sums, inverse, encodings)
+			counts = np.bincount(inverse, minlength=len(labels))
+			encodings = sums / counts[:, None].astype("float32")
+			names = labels
+
+		self.matrix = np.ascontiguousarray(encodings, dtype="float32")
+		self.labels = names
+		self.sqNorms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+	@classmethod
+	def load(cls, conf):
+		store = open_encoding_store(conf)
+
+		return cls(store.encodings, store.names,
+			threshold=conf["nn_threshold"] or 0.5,
+			mode=conf["nn_mode"] or "gallery")
+
+	def distances(self, encodings):
+		# euclidean distances between the queries and the gallery, using
+		# ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab so the bulk of the work
+		# is a single matrix product
+		q = np.asarray(encodings, dtype="float32").reshape(-1,
+			self.matrix.shape[1])
+		d = np.einsum("ij,ij->i", q, q)[:, None] + self.sqNorms[None, :] \
+			- 2.0 * (q @ self.matrix.T)
+
+		return np.sqrt(np.maximum(d, 0.0, out=d), out=d)
+
+	def predict(self, encodings):
+		# return an (id, confidence) pair for every encoding, faces
+		# farther than the threshold from every gallery entry are
+		# reported as unknown, the confidence is 1 - distance
+		if len(encodings) == 0 or len(self.labels) == 0:
+			return [(UNKNOWN, 0.0) for _ in encodings]
+
+		d = self.distances(encodings)
+		js = np.argmin(d, axis=1)
+		best = d[np.arange(len(js)), js]
+
+		return [(self.labels[j] if dist <= self.threshold else UNKNOWN,
+			max(0.0, float(1.0 - dist))) for (j, dist) in zip(js, best)]
+
+class IndexRecognizer:
+	def __init__(self, index, threshold=0.5):
+		# nearest neighbour matching through an EmbeddingIndex, suited to
+		# galleries of tens of thousands of people
+		self.index = index
+		self.threshold = threshold
+
+	@classmethod
+	def load(cls, conf):
+		# load the prebuilt index when there is one, otherwise build it
+		# from the encodings
+		indexPath = conf["index_path"]
+		if indexPath and os.path.exists(indexPath):
+			index = EmbeddingIndex.load(indexPath)
+		else:
+			store = open_encoding_store(conf)
+			index = EmbeddingIndex.build(store.encodings, store.names,
+				kind=conf["index_type"] or "exact",
+				nlist=conf["index_nlist"] or 0,
+				nprobe=conf["index_nprobe"] or 8)
+
+		return cls(index, threshold=conf["nn_threshold"] or 0.5)
+
+	def predict(self, encodings):
+		# return an (id, confidence) pair for every encoding
+		if len(encodings) == 0 or len(self.index) == 0:
+			return [(UNKNOWN, 0.0) for _ in encodings]
+
+		(d, labels) = self.index.search(encodings, k=1)
+
+		return [(label if dist <= self.threshold else UNKNOWN,
+			max(0.0, float(1.0 - dist))) for (label, dist) in
+			zip(labels[:, 0], d[:, 0])]
+
+class PrototypeRecognizer:
+	def __init__(self, labels=None, sums=None, counts=None, threshold=0.5):
+		# one prototype (mean encoding) per person, the running sums and
+		# counts let a single person be added, updated or removed without
+		# touching anybody else
+		self.labels = [] if labels is None else list(labels)
+		self.sums = np.zeros((0, 128), dtype="float64") if sums is None \
+			else np.asarray(sums, dtype="float64")
+		self.counts = np.zeros(0, dtype="int64") if counts is None \
+			else np.asarray(counts, dtype="int64")
+		self.threshold = threshold
+		self._update()
+
+	def _update(self):
+		# refresh the float32 prototype matrix used for matching
+		self.positions = {l: i for (i, l) in enumerate(self.labels)}
+		self.matrix = np.ascontiguousarray(self.sums / np.maximum(
+			self.counts, 1)[:, None], dtype="float32")
+		self.sqNorms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+	@classmethod
+	def fit(cls, encodings, names, threshold=0.5):
+		# build the prototypes of every person in one pass
+		encodings = np.asarray(encodings, dtype="float64").reshape(-1, 128)
+		(labels, inverse) = np.unique(np.asarray(names, dtype=str),
+			return_inverse=True)
+		sums = np.zeros((len(labels), 128), dtype="float64")
+		np.add.at(sums, inverse, encodings)
+		counts = np.bincount(inverse, minlength=len(labels))
+
+		return cls(labels, sums, counts, threshold=threshold)
+
+	@classmethod
+	def load(cls, conf):
+		# load the saved prototypes, or fit them from the encodings store
+		# when they were never saved
+		threshold = conf["nn_threshold"] or 0.5
+		path = conf["prototype_path"]
+		if path and os.path.exists(path):
+			with np.load(path, allow_pickle=False) as data:
+				return cls(data["labels"], data["sums"], data["counts"],
+					threshold=threshold)
+
+		store = open_encoding_store(conf)
+
+		return cls.fit(store.encodings, store.names, threshold=threshold)
+
+	def save(self, path):
+		# write the prototypes to a temporary file and rename it into place
+		with atomic_write(path) as f:
+			np.savez(f, labels=np.asarray(self.labels, dtype=str),
+				sums=self.sums, counts=self.counts)
+
+	def add(self, name, encodings):
+		# add the encodings of a person, creating the prototype if needed
+		encodings = np.asarray(encodings, dtype="float64").reshape(-1, 128)
+		i = self.positions.get(name)
+		if i is None:
+			self.labels.append(name)
+			self.sums = np.vstack([self.sums, encodings.sum(axis=0)])
+			self.counts = np.append(self.counts, len(encodings))
+		else:
+			self.sums[i] += encodings.sum(axis=0)
+			self.counts[i] += len(encodings)
+		self._update()
+
+	def remove(self, name):
+		# drop the prototype of a person, returns False if unknown
+		i = self.positions.get(name)
+		if i is None:
+			return False
+
+		del self.labels[i]
+		self.sums = np.delete(self.sums, i, axis=0)
+		self.counts = np.delete(self.counts, i)
+		self._update()
+
+		return True
+
+	def predict(self, encodings):
+		# return an (id, confidence) pair for every encoding, faces
+		# farther than the threshold from every prototype are unknown
+		if len(encodings) == 0 or len(self.labels) == 0:
+			return [(UNKNOWN, 0.0) for _ in encodings]
+
+		q = np.asarray(encodings, dtype="float32").reshape(-1, 128)
+		d = np.einsum("ij,ij->i", q, q)[:, None] + self.sqNorms[None, :] \
+			- 2.0 * (q @ self.matrix.T)
+		d = np.sqrt(np.maximum(d, 0.0))
+		js = np.argmin(d, axis=1)
+		best = d[np.arange(len(js)), js]
+
+		return [(self.labels[j] if dist <= self.threshold else UNKNOWN,
+			max(0.0, float(1.0 - dist))) for (j, dist) in zip(js, best)]
+
+# recognizer backends selectable with the "recognizer_backend" option
+BACKENDS = {
+	"svc": SVCRecognizer,
+	"nn": NearestNeighborRecognizer,
+	"index": IndexRecognizer,
+	"prototype": PrototypeRecognizer,
+}
+
+def load_recognizer(conf):
+	# build the recognizer selected in the configuration
+	backend = conf["recognizer_backend"] or "svc"
+	if backend not in BACKENDS:
+		raise ValueError("unknown recognizer backend: {}".format(backend))
+
+	return BACKENDS[backend].load(conf)
@@ -0,0 +1,84 @@
+# import the necessary packages
+from ..models import model_repository, resolve_models, ARTIFACTS
+from .recognizers import load_recognizer
+import threading
+import os
+
+def model_version(conf):
+	# version marker of the model in use: the CURRENT pointer of the
+	# model directory, or the modification times of the flat artifacts
+	repo = model_repository(conf)
+	if repo is not None:
+		return repo.current_version()
+
+	marker = []
+	for key in ARTIFACTS:
+		try:
+			marker.append(os.stat(conf[key]).st_mtime_ns if conf[key]
+				else None)
+		except FileNotFoundError:
+			marker.append(None)
+
+	return tuple(marker)
+
+class ModelWatcher:
+	def __init__(self, conf, on_reload, interval=5.0):
+		# poll the version marker every `interval` seconds and hand a
+		# freshly loaded recognizer to `on_reload(recognizer, version)`
+		self.conf = conf
+		self.onReload = on_reload
+		self.interval = interval
+		self.version = model_version(conf)
+		self.pending = None
+		self.stopped = threading.Event()
+		self.thread = None
+
+	def start(self):
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+
+		return self
+
+	def check(self):
+		# load the new model when the version changed, the load happens on
+		# the calling (background) thread so frames are never held up
+		version = model_version(self.conf)
+		if version == self.version:
+			return False
+
+		# the flat artifacts are replaced one after the other (the SVC
+		# and then its label encoder), only load them once the marker
+		# stayed the same for a whole poll interval, a published version
+		# is complete as soon as CURRENT names it
+		flat = model_repository(self.conf) is None
+		if flat and version != self.pending:
+			self.pending = version
+			return False
+
+		try:
+			recognizer = load_recognizer(resolve_models(self.conf))
+		except Exception as e:
+			# a half-written flat model is retried on the next poll
+			print("[ERROR] failed to reload the model: {}".format(e))
+			return False
+
+		# an artifact replaced while loading may pair a new model with an
+		# old label encoder, drop it and retry on the next poll
+		if flat and model_version(self.conf) != version:
+			self.pending = None
+			return False
+
+		self.version = version
+		self.onReload(recognizer, version)
+
+		return True
+
+	def _run(self):
+		while not self.stopped.wait(self.interval):
+			self.check()
+
+	def stop(self):
+		self.stopped.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
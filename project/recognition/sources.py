@@ -0,0 +1,76 @@
+# import the necessary packages
+from imutils import paths
+import cv2
+import os
+
+class FrameSource:
+	def __init__(self, source):
+		# store the source description, the frames are produced lazily
+		# so that nothing is opened until the first read
+		self.source = source
+		self.capture = None
+		self.iterator = None
+		self.opened = False
+		self.released = False
+
+		# cameras and stream URLs keep producing frames in real time,
+		# video files, image folders and iterables are finite
+		self.live = isinstance(source, int) or (isinstance(source, str) and
+			(source.isdigit() or "://" in source))
+
+	def open(self):
+		# open the underlying capture device (or image sequence)
+		self.opened = True
+		source = self.source
+
+		# a camera index (int or digit string) opens a live stream
+		if isinstance(source, int) or (isinstance(source, str) and
+			source.isdigit()):
+			self.capture = cv2.VideoCapture(int(source), cv2.CAP_DSHOW)
+
+		# a directory is treated as an ordered sequence of still images
+		elif isinstance(source, str) and os.path.isdir(source):
+			imagePaths = sorted(paths.list_images(source))
+			self.iterator = (cv2.imread(p) for p in imagePaths)
+
+		# any other string is a video file (or stream URL) OpenCV can open
+		elif isinstance(source, str):
+			self.capture = cv2.VideoCapture(source)
+
+		# otherwise we expect an iterable of BGR numpy frames
+		else:
+			self.iterator = iter(source)
+
+	def read(self):
+		# mirror the cv2.VideoCapture API so callers can swap sources, a
+		# released source reads as exhausted
+		if self.released:
+			return (False, None)
+		if not self.opened:
+			self.open()
+
+		if self.capture is not None:
+			return self.capture.read()
+
+		try:
+			frame = next(self.iterator)
+		except StopIteration:
+			return (False, None)
+
+		return (frame is not None, frame)
+
+	def __iter__(self):
+		# yield frames until the source is exhausted or fails
+		while True:
+			(ret, frame) = self.read()
+			if not ret:
+				break
+			yield frame
+
+	def release(self):
+		# release the underlying capture device (if any)
+		self.released = True
+		self.iterator = None
+		if self.capture is not None:
+			self.capture.release()
+			self.capture = None
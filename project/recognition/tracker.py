@@ -0,0 +1,211 @@
+# import the necessary packages
+from .recognizers import UNKNOWN
+import cv2
+
+# OpenCV tracker constructor names, depending on the OpenCV build they
+# live either on the main module or on `cv2.legacy`
+TRACKERS = {
+	"kcf": "TrackerKCF_create",
+	"csrt": "TrackerCSRT_create",
+	"mosse": "TrackerMOSSE_create",
+	"mil": "TrackerMIL_create",
+}
+
+# trackers already reported as missing, so the warning is printed once
+# instead of once per track
+missingTrackers = set()
+
+def find_cv_tracker(name):
+	# return the constructor of an OpenCV tracker, or None when it is
+	# unknown or not available in this OpenCV build
+	constructor = TRACKERS.get((name or "").lower())
+	if constructor is None:
+		return None
+
+	for owner in (cv2, getattr(cv2, "legacy", None)):
+		if owner is not None and hasattr(owner, constructor):
+			return getattr(owner, constructor)
+
+	return None
+
+def create_cv_tracker(name):
+	# return a new OpenCV tracker, "iou" (or no name) keeps the boxes in
+	# place until the next detection, a tracker missing from this OpenCV
+	# build (KCF, CSRT and MOSSE need opencv-contrib-python) falls back
+	# to MIL which ships with plain opencv-python
+	if (name or "iou").lower() == "iou":
+		return None
+
+	constructor = find_cv_tracker(name)
+	if constructor is None:
+		if name not in missingTrackers:
+			missingTrackers.add(name)
+			print("[ERROR] tracker '{}' is not available in this OpenCV "
+				"build, falling back to 'mil'".format(name))
+		constructor = find_cv_tracker("mil")
+
+	return constructor() if constructor is not None else None
+
+def iou(a, b):
+	# compute the intersection over union of two (top, right, bottom,
+	# left) boxes
+	(aTop, aRight, aBottom, aLeft) = a
+	(bTop, bRight, bBottom, bLeft) = b
+	w = min(aRight, bRight) - max(aLeft, bLeft)
+	h = min(aBottom, bBottom) - max(aTop, bTop)
+	if w <= 0 or h <= 0:
+		return 0.0
+
+	inter = float(w * h)
+	areaA = (aRight - aLeft) * (aBottom - aTop)
+	areaB = (bRight - bLeft) * (bBottom - bTop)
+
+	return inter / (areaA + areaB - inter)
+
+class Track:
+	def __init__(self, trackID, box):
+		# each track owns its box, its latest identity (None until it has
+		# been classified), the number of consecutive classifications
+		# that agreed on it and an optional OpenCV tracker
+		self.trackID = trackID
+		self.box = box
+		self.misses = 0
+		self.cvTracker = None
+		self.reset()
+
+	def reset(self):
+		# forget the identity, the track is classified again at the next
+		# detection
+		self.id = None
+		self.probability = 0.0
+		self.votes = 0
+		self.confirmed = False
+
+	def vote(self, id, probability, min_probability, confirm_count):
+		# record a classification, unknown and low confidence results
+		# never count towards the identity, the identity is confirmed
+		# (and no longer classified) once `confirm_count` consecutive
+		# classifications agreed
+		if id == UNKNOWN or probability < min_probability:
+			self.votes = 0
+		elif id == self.id:
+			self.votes += 1
+		else:
+			self.votes = 1
+
+		self.id = id
+		self.probability = probability
+		self.confirmed = self.votes >= confirm_count
+
+	def init(self, frame, name):
+		# (re)initialize the OpenCV tracker on the current box
+		self.cvTracker = create_cv_tracker(name)
+		if self.cvTracker is not None:
+			(top, right, bottom, left) = self.box
+			self.cvTracker.init(frame, (left, top, right - left,
+				bottom - top))
+
+	def follow(self, frame):
+		# move the box with the OpenCV tracker, without a tracker the box
+		# simply stays where it was last detected
+		if self.cvTracker is None:
+			return True
+
+		(ok, (x, y, w, h)) = self.cvTracker.update(frame)
+		if not ok:
+			return False
+
+		(H, W) = frame.shape[:2]
+		self.box = (max(0, int(y)), min(W, int(x + w)), min(H, int(y + h)),
+			max(0, int(x)))
+
+		return True
+
+class FaceTracker:
+	def __init__(self, detect, classify, detect_every=5, tracker="mil",
+		iou_threshold=0.3, max_misses=2, min_probability=0.0,
+		confirm_count=2):
+		# `detect(frame)` returns (rgb, boxes) and `classify(rgb, boxes)`
+		# returns one (id, probability) pair per box
+		self.detect = detect
+		self.classify = classify
+		self.detectEvery = max(1, detect_every)
+		self.trackerName = tracker
+		self.iouThreshold = iou_threshold
+		self.maxMisses = max_misses
+		self.minProbability = min_probability
+		self.confirmCount = max(1, confirm_count)
+
+		# initialize the tracks and the frame counter
+		self.tracks = []
+		self.nextTrackID = 0
+		self.frameCount = 0
+
+	def update(self, frame):
+		# run a full detection every N frames or whenever a track is
+		# lost, otherwise just follow the existing boxes
+		needDetect = self.frameCount % self.detectEvery == 0
+		self.frameCount += 1
+
+		if not needDetect:
+			for t in self.tracks:
+				if not t.follow(frame):
+					needDetect = True
+
+		if needDetect:
+			self._redetect(frame)
+
+		return self.tracks
+
+	def _redetect(self, frame):
+		(rgb, boxes) = self.detect(frame)
+
+		# greedily associate detections with tracks by IoU, best pairs
+		# first
+		pairs = sorted(((iou(t.box, b), i, j)
+			for (i, t) in enumerate(self.tracks)
+			for (j, b) in enumerate(boxes)), reverse=True)
+		usedTracks = set()
+		usedBoxes = set()
+
+		for (score, i, j) in pairs:
+			if score < self.iouThreshold:
+				break
+			if i in usedTracks or j in usedBoxes:
+				continue
+
+			usedTracks.add(i)
+			usedBoxes.add(j)
+			self.tracks[i].box = boxes[j]
+			self.tracks[i].misses = 0
+
+		# tracks without a detection are dropped after a few misses
+		kept = []
+		for (i, t) in enumerate(self.tracks):
+			if i not in usedTracks:
+				t.misses += 1
+				if t.misses > self.maxMisses:
+					continue
+			kept.append(t)
+
+		# every unmatched detection starts a new track
+		for (j, b) in enumerate(boxes):
+			if j not in usedBoxes:
+				kept.append(Track(self.nextTrackID, b))
+				self.nextTrackID += 1
+
+		self.tracks = kept
+
+		# only the tracks without a confirmed identity are encoded,
+		# in a single batch
+		pending = [t for t in self.tracks if not t.confirmed and
+			t.misses == 0]
+		if len(pending) > 0:
+			preds = self.classify(rgb, [t.box for t in pending])
+			for (t, (id, prob)) in zip(pending, preds):
+				t.vote(id, prob, self.minProbability, self.confirmCount)
+
+		# restart the OpenCV trackers on the refreshed boxes
+		for t in self.tracks:
+			if t.misses == 0:
+				t.init(frame, self.trackerName)
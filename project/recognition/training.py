@@ -0,0 +1,106 @@
+# import the necessary packages
+from .recognizers import PrototypeRecognizer
+from .index import EmbeddingIndex
+from ..utils.atomic import atomic_write
+import pickle
+import os
+
+def dump_pickle(obj, path):
+	# pickle to a temporary file and rename it into place, artifacts are
+	# never written in place since staged versions share files with the
+	# published ones
+	with atomic_write(path) as f:
+		pickle.dump(obj, f)
+
+def train_svc(conf, store):
+	# imported here so the prototype path does not need scikit-learn
+	from sklearn.preprocessing import LabelEncoder
+	from sklearn.svm import SVC
+
+	# encode the labels
+	print("[INFO] encoding labels...")
+	le = LabelEncoder()
+	labels = le.fit_transform(store.names)
+
+	# train the model used to accept the 128-d encodings of the face
+	print("[INFO] training model...")
+	recognizer = SVC(C=1.0, kernel="linear", probability=True)
+	recognizer.fit(store.encodings, labels)
+
+	# write the model and the label encoder to disk
+	print("[INFO] writing the model to disk...")
+	dump_pickle(recognizer, conf["recognizer_path"])
+	dump_pickle(le, conf["le_path"])
+
+	return (recognizer, le)
+
+def train_prototypes(conf, store):
+	# build one prototype per person and write them to disk
+	print("[INFO] building prototypes...")
+	model = PrototypeRecognizer.fit(store.encodings, store.names,
+		threshold=conf["nn_threshold"] or 0.5)
+	model.save(conf["prototype_path"])
+
+	return model
+
+def build_index(conf, store):
+	# build the embedding index over the store and write it to disk
+	print("[INFO] building {} index...".format(conf["index_type"] or
+		"exact"))
+	index = EmbeddingIndex.build(store.encodings, store.names,
+		kind=conf["index_type"] or "exact", nlist=conf["index_nlist"] or 0,
+		nprobe=conf["index_nprobe"] or 8)
+	index.save(conf["index_path"])
+
+	return index
+
+def train(conf, store):
+	# train the model of the configured recognizer backend, the nearest
+	# neighbour backend matches the encodings directly (nothing to train)
+	# and the SVC stays the default
+	backend = conf["recognizer_backend"]
+	if backend == "prototype":
+		return train_prototypes(conf, store)
+	if backend == "index":
+		return build_index(conf, store)
+	if backend == "nn":
+		return None
+
+	return train_svc(conf, store)
+
+def remove_person(conf, store, person_id):
+	# update the model after a person was removed from the store, the
+	# prototype model only drops one row, the nearest neighbour backend
+	# reads the store directly and the SVC is retrained
+	backend = conf["recognizer_backend"]
+	if backend == "prototype":
+		model = PrototypeRecognizer.load(conf)
+		model.remove(person_id)
+		model.save(conf["prototype_path"])
+		return model
+
+	if backend == "nn":
+		return None
+
+	return train(conf, store)
+
+def add_person(conf, store, person_id, encodings):
+	# update the model after a person's encodings were appended to the
+	# store, the prototype model only gains one row, the nearest
+	# neighbour backend reads the store directly and the SVC (or the
+	# index) is rebuilt from the store without re-encoding anything
+	backend = conf["recognizer_backend"]
+	if backend == "prototype":
+		if not os.path.exists(conf["prototype_path"]):
+			return train_prototypes(conf, store)
+
+		model = PrototypeRecognizer.load(conf)
+		model.remove(person_id)
+		model.add(person_id, encodings)
+		model.save(conf["prototype_path"])
+		return model
+
+	if backend == "nn":
+		return None
+
+	return train(conf, store)
@@ -0,0 +1,33 @@
+# import the necessary packages
+from .students import StudentIndex
+from .sqlite import SQLiteDatabase
+from .sqlite import SQLiteStudents
+from .sqlite import migrate_students_json
+from .sqlite import backfill_student_class
+
+def open_database(conf):
+	# the SQLite database of the "sqlite" storage backend
+	return SQLiteDatabase(conf["sqlite_path"] or "database/attendance.db")
+
+def open_students(conf):
+	# open the student repository of the configured storage backend, the
+	# SQLite backend imports the TinyDB students the first time
+	if conf["storage_backend"] != "sqlite":
+		return StudentIndex(conf["db_path"])
+
+	db = open_database(conf)
+	students = SQLiteStudents(db)
+	if db.get_meta("students_migrated") is None:
+		count = migrate_students_json(conf["db_path"], students,
+			cls=conf["class"])
+		db.set_meta("students_migrated", conf["db_path"])
+		if count > 0:
+			print("[INFO] migrated {} students from {}".format(count,
+				conf["db_path"]))
+
+	# databases migrated before the students got a class
+	if db.get_meta("students_class") is None and conf["class"]:
+		backfill_student_class(students, conf["class"])
+		db.set_meta("students_class", conf["class"])
+
+	return students
@@ -0,0 +1,212 @@
+# import the necessary packages
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import sqlite3
+import json
+import os
+
+# students are looked up by id (and listed per class), attendance by
+# student and day (one event per student and day) and by date range
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+CREATE TABLE IF NOT EXISTS students (
+	id TEXT PRIMARY KEY,
+	name TEXT NOT NULL,
+	status TEXT NOT NULL DEFAULT 'enrolled',
+	class TEXT,
+	enrolled_at TEXT
+);
+CREATE INDEX IF NOT EXISTS students_class ON students (class, id);
+CREATE INDEX IF NOT EXISTS students_name ON students (name);
+CREATE TABLE IF NOT EXISTS attendance (
+	student_id TEXT NOT NULL,
+	name TEXT NOT NULL,
+	date TEXT NOT NULL,
+	date_time TEXT NOT NULL,
+	UNIQUE (student_id, date)
+);
+CREATE INDEX IF NOT EXISTS attendance_date_time ON attendance (date_time,
+	student_id);
+CREATE INDEX IF NOT EXISTS attendance_name ON attendance (name, date_time);
+"""
+
+class SQLiteDatabase:
+	def __init__(self, path, timeout=5.0):
+		# the database runs in WAL mode: readers never block the writer
+		# and the single writer never blocks readers, other processes
+		# (the enroll window, the recognizer, the records viewer) wait
+		# up to `timeout` seconds for the write lock
+		self.path = path
+		self.timeout = timeout
+		self.local = threading.local()
+		self.writeLock = threading.Lock()
+
+		dirName = os.path.dirname(path)
+		if dirName:
+			os.makedirs(dirName, exist_ok=True)
+
+		conn = self.connect()
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.executescript(SCHEMA)
+
+	def connect(self):
+		# sqlite connections are bound to their thread, so every thread
+		# gets its own (autocommit, transactions are explicit)
+		conn = getattr(self.local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=self.timeout,
+				isolation_level=None)
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute("PRAGMA busy_timeout={}".format(
+				int(self.timeout * 1000)))
+			self.local.conn = conn
+
+		return conn
+
+	@contextmanager
+	def transaction(self):
+		# take the write lock up front so concurrent writers queue
+		# instead of failing half way through
+		conn = self.connect()
+		with self.writeLock:
+			conn.execute("BEGIN IMMEDIATE")
+			try:
+				yield conn
+			except BaseException:
+				conn.execute("ROLLBACK")
+				raise
+			conn.execute("COMMIT")
+
+	def query(self, sql, params=()):
+		# the cursor streams the rows, nothing is loaded up front
+		return self.connect().execute(sql, params)
+
+	def get_meta(self, key):
+		row = self.query("SELECT value FROM meta WHERE key = ?",
+			(key,)).fetchone()
+
+		return row[0] if row is not None else None
+
+	def set_meta(self, key, value):
+		with self.transaction() as conn:
+			conn.execute("INSERT OR REPLACE INTO meta (key, value) "
+				"VALUES (?, ?)", (key, value))
+
+	def close(self):
+		# close the connection of the calling thread
+		conn = getattr(self.local, "conn", None)
+		if conn is not None:
+			conn.close()
+			self.local.conn = None
+
+class SQLiteStudents:
+	def __init__(self, db):
+		# the student repository on top of the SQLite database, same
+		# interface as the JSON StudentIndex
+		self.db = db
+
+	def refresh(self):
+		# every lookup reads the database, there is no cache to refresh
+		return False
+
+	def get(self, id, default="unknown"):
+		# return the name of the student
+		row = self.db.query("SELECT name FROM students WHERE id = ?",
+			(id,)).fetchone()
+
+		return row[0] if row is not None else default
+
+	def __contains__(self, id):
+		return self.db.query("SELECT 1 FROM students WHERE id = ?",
+			(id,)).fetchone() is not None
+
+	def items(self):
+		# return the (id, name, status) rows of the enrolled students
+		return self.db.query("SELECT id, name, status FROM students "
+			"ORDER BY id").fetchall()
+
+	def classes(self):
+		# the distinct classes of the enrolled students
+		return [row[0] for row in self.db.query("SELECT DISTINCT class FROM "
+			"students WHERE class IS NOT NULL ORDER BY class")]
+
+	def page(self, cls=None, person=None, after=None, limit=None):
+		# yield (id, name, status) rows ordered by id, filtered by class
+		# and person (id or name), starting after the id `after` of the
+		# previous page, every filter is answered from an index
+		(where, params) = ([], [])
+		if cls is not None:
+			where.append("class = ?")
+			params.append(cls)
+		if person is not None:
+			where.append("(id = ? OR name = ?)")
+			params.extend([person, person])
+		if after is not None:
+			where.append("id > ?")
+			params.append(after)
+
+		sql = "SELECT id, name, status FROM students"
+		if len(where) > 0:
+			sql += " WHERE " + " AND ".join(where)
+		sql += " ORDER BY id"
+		if limit is not None:
+			sql += " LIMIT {}".format(int(limit))
+
+		for row in self.db.query(sql, params):
+			yield row
+
+	def add(self, id, name, status="enrolled", cls=None):
+		# enroll a student, returns False when the id is already taken
+		with self.db.transaction() as conn:
+			cursor = conn.execute("INSERT OR IGNORE INTO students (id, name, "
+				"status, class, enrolled_at) VALUES (?, ?, ?, ?, ?)", (id,
+				name, status, cls, datetime.now().strftime(
+				"%Y-%m-%d %H:%M:%S")))
+
+		return cursor.rowcount > 0
+
+	def delete(self, id):
+		# remove a student, returns False when the id is unknown
+		with self.db.transaction() as conn:
+			cursor = conn.execute("DELETE FROM students WHERE id = ?", (id,))
+
+		return cursor.rowcount > 0
+
+def migrate_students_json(dbPath, students, cls=None):
+	# copy the students of the TinyDB file into the repository, they are
+	# all enrolled in the class `cls` (the JSON file has no classes), the
+	# JSON file is left in place as a backup
+	try:
+		with open(dbPath, "r") as file:
+			data = json.load(file)
+	except (FileNotFoundError, ValueError):
+		return 0
+
+	rows = []
+	for record in data.get("student", {}).values():
+		for (id, details) in record.items():
+			name = details[0] if len(details) > 0 else "unknown"
+			status = details[1] if len(details) > 1 else "unknown"
+			rows.append((id, name, status, cls))
+
+	# a single transaction for the whole table
+	with students.db.transaction() as conn:
+		before = conn.total_changes
+		conn.executemany("INSERT OR IGNORE INTO students (id, name, "
+			"status, class) VALUES (?, ?, ?, ?)", rows)
+		count = conn.total_changes - before
+
+	return count
+
+def backfill_student_class(students, cls):
+	# put the students migrated without a class into `cls`, every other
+	# enrollment path sets the class
+	with students.db.transaction() as conn:
+		cursor = conn.execute("UPDATE students SET class = ? WHERE class "
+			"IS NULL", (cls,))
+
+	return cursor.rowcount
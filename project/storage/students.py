@@ -0,0 +1,138 @@
+# import the necessary packages
+from ..utils.atomic import atomic_write
+from tinydb import TinyDB
+import threading
+import json
+import time
+import os
+
+class StudentIndex:
+	def __init__(self, dbPath, check_interval=1.0):
+		# store the path to the TinyDB student database and how often (in
+		# seconds) the file is checked for changes
+		self.dbPath = dbPath
+		self.checkInterval = check_interval
+		self.lock = threading.Lock()
+
+		# id -> (name, status) index and the (mtime, size) signature of
+		# the file it was built from
+		self.students = {}
+		self.signature = None
+		self.lastCheck = 0.0
+		self.reload()
+
+	def _signature(self):
+		try:
+			st = os.stat(self.dbPath)
+		except FileNotFoundError:
+			return None
+
+		return (st.st_mtime_ns, st.st_size)
+
+	def reload(self):
+		# rebuild the index from the TinyDB file, each document of the
+		# student table maps a student id to [name, status]
+		signature = self._signature()
+		students = {}
+
+		try:
+			with open(self.dbPath, "r") as file:
+				data = json.load(file)
+		except (FileNotFoundError, ValueError):
+			data = {}
+
+		for record in data.get("student", {}).values():
+			for (id, details) in record.items():
+				name = details[0] if len(details) > 0 else "unknown"
+				status = details[1] if len(details) > 1 else "unknown"
+				students[id] = (name, status)
+
+		with self.lock:
+			self.students = students
+			self.signature = signature
+			self.lastCheck = time.monotonic()
+
+	def refresh(self):
+		# reload the index if the file changed, the stat call is rate
+		# limited so lookups on the hot path stay dictionary lookups
+		now = time.monotonic()
+		if now - self.lastCheck < self.checkInterval:
+			return False
+
+		self.lastCheck = now
+		if self._signature() == self.signature:
+			return False
+
+		self.reload()
+		return True
+
+	def get(self, id, default="unknown"):
+		# return the name of the student
+		self.refresh()
+		entry = self.students.get(id)
+
+		return entry[0] if entry is not None else default
+
+	def __contains__(self, id):
+		self.refresh()
+		return id in self.students
+
+	def items(self):
+		# return the (id, name, status) rows of the enrolled students
+		self.refresh()
+		return [(id, name, status) for (id, (name, status)) in
+			self.students.items()]
+
+	def classes(self):
+		# the TinyDB file has no class column
+		return []
+
+	def page(self, cls=None, person=None, after=None, limit=None):
+		# (id, name, status) rows ordered by id, filtered by person (id or
+		# name) and starting after the id `after` of the previous page,
+		# the TinyDB file has no class column so `cls` matches nothing
+		if cls is not None:
+			return []
+
+		rows = sorted(r for r in self.items() if (person is None or
+			person in (r[0], r[1])) and (after is None or r[0] > after))
+
+		return rows if limit is None else rows[:limit]
+
+	def add(self, id, name, status="enrolled", cls=None):
+		# enroll a student in the TinyDB file (which has no class column),
+		# returns False when the id is already taken
+		self.reload()
+		if id in self.students:
+			return False
+
+		db = TinyDB(self.dbPath)
+		try:
+			db.table("student").insert({id: [name, status]})
+		finally:
+			db.close()
+
+		self.reload()
+		return True
+
+	def delete(self, id):
+		# remove the document of a student from the TinyDB file, returns
+		# False when the id is unknown
+		try:
+			with open(self.dbPath, "r") as file:
+				data = json.load(file)
+		except (FileNotFoundError, ValueError):
+			return False
+
+		table = data.get("student", {})
+		docID = next((doc for (doc, record) in table.items()
+			if id in record), None)
+		if docID is None:
+			return False
+
+		del table[docID]
+		with atomic_write(self.dbPath, "w") as file:
+			json.dump(data, file, indent=4)
+
+		self.reload()
+		return True
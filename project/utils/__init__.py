@@ -1,4 +1,10 @@
 __author__ = 'adrianrosebrock'
 
 # import the necessary packages
-from .conf import Conf
\ No newline at end of file
+from .conf import Conf
+from .atomic import atomic_write
+from .timing import StageReport
+from .metrics import LoopMetrics
+from .metrics import NullMetrics
+from .metrics import MetricsExporter
+from .metrics import create_metrics
@@ -0,0 +1,24 @@
+# import the necessary packages
+from contextlib import contextmanager
+import os
+
+@contextmanager
+def atomic_write(path, mode="wb"):
+	# yield a temporary file next to `path`, once the block completes it
+	# is fsynced and renamed over `path` so readers (and a crash) only
+	# ever see the old or the new content, a failed block leaves `path`
+	# untouched
+	tmpPath = "{}.tmp".format(path)
+	try:
+		with open(tmpPath, mode) as f:
+			yield f
+			f.flush()
+			os.fsync(f.fileno())
+	except BaseException:
+		try:
+			os.remove(tmpPath)
+		except OSError:
+			pass
+		raise
+
+	os.replace(tmpPath, path)
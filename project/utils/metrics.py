@@ -0,0 +1,242 @@
+# import the necessary packages
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from .atomic import atomic_write
+from contextlib import nullcontext
+from collections import deque
+import numpy as np
+import threading
+import json
+import time
+import os
+
+# the shared no-op timer of disabled metrics
+NULL_TIMER = nullcontext()
+
+class StageTimer:
+	def __init__(self, metrics, name):
+		# time the enclosed block and record it under `name`
+		self.metrics = metrics
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		self.metrics.record(self.name, time.perf_counter() - self.start)
+		return False
+
+class LoopMetrics:
+	enabled = True
+
+	def __init__(self, window=300):
+		# the latest `window` latencies of every stage, the running totals
+		# for the exported counters and the recent frame timestamps for
+		# the FPS
+		self.window = window
+		self.samples = {}
+		self.totals = {}
+		self.frames = deque(maxlen=window)
+		self.frameCount = 0
+		self.lock = threading.Lock()
+
+	def stage(self, name):
+		return StageTimer(self, name)
+
+	def record(self, name, seconds):
+		with self.lock:
+			samples = self.samples.get(name)
+			if samples is None:
+				samples = self.samples[name] = deque(maxlen=self.window)
+				self.totals[name] = [0, 0.0]
+			samples.append(seconds)
+			self.totals[name][0] += 1
+			self.totals[name][1] += seconds
+
+	def tick(self):
+		# mark a processed frame
+		with self.lock:
+			self.frames.append(time.perf_counter())
+			self.frameCount += 1
+
+	def fps(self):
+		with self.lock:
+			if len(self.frames) < 2:
+				return 0.0
+			elapsed = self.frames[-1] - self.frames[0]
+			return (len(self.frames) - 1) / elapsed if elapsed > 0 else 0.0
+
+	def snapshot(self):
+		# rolling p50/p95/p99 (in milliseconds) of every stage
+		with self.lock:
+			samples = {name: list(s) for (name, s) in self.samples.items()}
+			totals = {name: tuple(t) for (name, t) in self.totals.items()}
+			frameCount = self.frameCount
+
+		stages = {}
+		for (name, values) in samples.items():
+			(p50, p95, p99) = np.percentile(np.array(values) * 1000.0,
+				[50, 95, 99])
+			stages[name] = {"count": totals[name][0],
+				"sum_seconds": round(totals[name][1], 6),
+				"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+				"p99_ms": round(float(p99), 3)}
+
+		return {"fps": round(self.fps(), 2), "frames": frameCount,
+			"stages": stages}
+
+	def overlay_lines(self):
+		# short lines for drawing on to the frame
+		snapshot = self.snapshot()
+		lines = ["FPS {:.1f}".format(snapshot["fps"])]
+		for (name, s) in sorted(snapshot["stages"].items()):
+			lines.append("{} {:.1f}/{:.1f}/{:.1f}ms".format(name, s["p50_ms"],
+				s["p95_ms"], s["p99_ms"]))
+
+		return lines
+
+	def prometheus(self):
+		# the snapshot in the Prometheus text exposition format
+		snapshot = self.snapshot()
+		lines = ["# TYPE face_attendance_stage_seconds summary"]
+		for (name, s) in sorted(snapshot["stages"].items()):
+			for (q, key) in (("0.5", "p50_ms"), ("0.95", "p95_ms"),
+				("0.99", "p99_ms")):
+				lines.append('face_attendance_stage_seconds{{stage="{}",'
+					'quantile="{}"}} {}'.format(name, q, s[key] / 1000.0))
+			lines.append('face_attendance_stage_seconds_sum{{stage="{}"}} '
+				'{}'.format(name, s["sum_seconds"]))
+			lines.append('face_attendance_stage_seconds_count{{stage="{}"}} '
+				'{}'.format(name, s["count"]))
+
+		lines.append("# TYPE face_attendance_fps gauge")
+		lines.append("face_attendance_fps {}".format(snapshot["fps"]))
+		lines.append("# TYPE face_attendance_frames_total counter")
+		lines.append("face_attendance_frames_total {}".format(
+			snapshot["frames"]))
+
+		return "\n".join(lines) + "\n"
+
+class NullMetrics:
+	# stand-in used when the metrics are disabled, every call is a no-op
+	# so the hot path only pays for an attribute lookup
+	enabled = False
+
+	def stage(self, name):
+		return NULL_TIMER
+
+	def record(self, name, seconds):
+		pass
+
+	def tick(self):
+		pass
+
+	def fps(self):
+		return 0.0
+
+	def snapshot(self):
+		return {"fps": 0.0, "frames": 0, "stages": {}}
+
+	def overlay_lines(self):
+		return []
+
+	def prometheus(self):
+		return ""
+
+class MetricsExporter:
+	def __init__(self, metrics, path=None, interval=10.0, port=0):
+		# periodically write the metrics to `path` (Prometheus text for
+		# .prom/.txt files, JSON otherwise) and/or serve them over HTTP on
+		# `port` at /metrics
+		self.metrics = metrics
+		self.path = path
+		self.interval = interval
+		self.port = port
+		self.stopped = threading.Event()
+		self.thread = None
+		self.server = None
+
+	def start(self):
+		if self.path:
+			self.thread = threading.Thread(target=self._run, daemon=True)
+			self.thread.start()
+
+		if self.port:
+			metrics = self.metrics
+
+			class Handler(BaseHTTPRequestHandler):
+				def do_GET(self):
+					if self.path.split("?")[0] != "/metrics":
+						self.send_error(404)
+						return
+
+					body = metrics.prometheus().encode("utf-8")
+					self.send_response(200)
+					self.send_header("Content-Type",
+						"text/plain; version=0.0.4")
+					self.send_header("Content-Length", str(len(body)))
+					self.end_headers()
+					self.wfile.write(body)
+
+				def log_message(self, format, *args):
+					pass
+
+			self.server = ThreadingHTTPServer(("127.0.0.1", self.port),
+				Handler)
+			threading.Thread(target=self.server.serve_forever,
+				daemon=True).start()
+			print("[INFO] serving metrics on http://127.0.0.1:{}/metrics"
+				.format(self.port))
+
+		return self
+
+	def write(self):
+		# write the current metrics atomically so readers never see a
+		# partial file
+		if os.path.splitext(self.path)[1] in (".prom", ".txt"):
+			data = self.metrics.prometheus()
+		else:
+			data = json.dumps(self.metrics.snapshot(), indent=4)
+
+		dirName = os.path.dirname(self.path)
+		if dirName:
+			os.makedirs(dirName, exist_ok=True)
+
+		with atomic_write(self.path, "w") as f:
+			f.write(data)
+
+	def _run(self):
+		while not self.stopped.wait(self.interval):
+			try:
+				self.write()
+			except OSError as e:
+				print("[ERROR] failed to write the metrics: {}".format(e))
+
+	def stop(self):
+		# stop the exporters and write the final metrics
+		self.stopped.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+			self.write()
+
+		if self.server is not None:
+			self.server.shutdown()
+			self.server.server_close()
+			self.server = None
+
+def create_metrics(conf):
+	# build the loop metrics and their exporter from the configuration,
+	# returning (NullMetrics, None) when the metrics are disabled
+	if not conf["metrics"]:
+		return (NullMetrics(), None)
+
+	metrics = LoopMetrics(window=conf["metrics_window"] or 300)
+	exporter = None
+	if conf["metrics_path"] or conf["metrics_port"]:
+		exporter = MetricsExporter(metrics, path=conf["metrics_path"],
+			interval=conf["metrics_interval"] or 10.0,
+			port=conf["metrics_port"] or 0).start()
+
+	return (metrics, exporter)
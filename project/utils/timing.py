@@ -0,0 +1,59 @@
+# import the necessary packages
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import time
+import sys
+
+def peak_memory_mb(children=False):
+	# peak resident memory of this process, or of its largest (finished)
+	# child process, the two are separate peaks and are never added up,
+	# `resource` is not available on Windows
+	try:
+		import resource
+	except ImportError:
+		return None
+
+	who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+	usage = resource.getrusage(who).ru_maxrss
+
+	# ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+	scale = 1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0
+
+	return usage / scale
+
+class StageReport:
+	def __init__(self, command, **params):
+		# collect the timings of the stages of a batch command
+		self.command = command
+		self.params = params
+		self.started = datetime.now().isoformat(timespec="seconds")
+		self.stages = []
+		self.start = time.perf_counter()
+
+	@contextmanager
+	def stage(self, name):
+		# time a stage, the caller sets record["items"] to the number of
+		# items it processed to get a throughput
+		record = {"name": name, "items": 0}
+		start = time.perf_counter()
+		try:
+			yield record
+		finally:
+			record["seconds"] = round(time.perf_counter() - start, 4)
+			record["items_per_sec"] = round(record["items"] /
+				record["seconds"], 2) if record["seconds"] > 0 else None
+			self.stages.append(record)
+
+	def as_dict(self):
+		return {"command": self.command, "started": self.started,
+			"params": self.params,
+			"seconds": round(time.perf_counter() - self.start, 4),
+			"peak_memory_mb": peak_memory_mb(),
+			"peak_child_memory_mb": peak_memory_mb(children=True),
+			"stages": self.stages}
+
+	def write(self, path):
+		# write the report as JSON
+		with open(path, "w") as f:
+			json.dump(self.as_dict(), f, indent=4)
@@ -1,65 +1,25 @@
 import tkinter as tk
 from tkinter import messagebox
 import cv2
-import time
-import numpy as np
 from PIL import Image, ImageTk
-from datetime import datetime
-import pickle
-import json
-from tinydb import TinyDB, where
-import face_recognition
 from project.utils import Conf
+from project.recognition import FaceAttendanceEngine, FrameSource, RecognitionPipeline
 
-# Initialize the configuration and recognizer
+# Initialize the configuration and the recognition engine
 conf = Conf("config/config.json")
-recognizer = pickle.loads(open(conf["recognizer_path"], "rb").read())
-le = pickle.loads(open(conf["le_path"], "rb").read())
-
-# Initialize the TinyDB for attendance and students
-db = TinyDB(conf["db_path"])
-studentTable = db.table("student")
-json_file_path_enroll = 'database/enroll.json'
-json_file_path_attendance = 'attendance.json'
+engine = FaceAttendanceEngine(conf)
 
 # Initialize the video capture
-vs = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-# Function to store attendance
-def store_attendance(name, id):
-    if not name or name.lower() == "unknown":
-        print("Face not recognized, attendance not stored.")
-        return
-
-    try:
-        with open(json_file_path_enroll, 'r') as file:
-            enroll_data = json.load(file)
-    except FileNotFoundError:
-        enroll_data = {"_default": {}, "student": {}}
-
-    students = enroll_data.get("student", {})
-    try:
-        with open(json_file_path_attendance, 'r') as file:
-            attendance_data = json.load(file)
-    except FileNotFoundError:
-        attendance_data = {"attendance": {}}
-
-    current_date = datetime.now().strftime("%Y-%m-%d")
-
-    if id in attendance_data['attendance']:
-        attendance_date = attendance_data['attendance'][id].get('date_time', "").split(" ")[0]
-        if attendance_date == current_date:
-            return f"Attendance for {name} (ID: {id}) already recorded for today."
-
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    attendance_data['attendance'][id] = {
-        "name": name,
-        "date_time": current_time
-    }
+vs = FrameSource(0)
 
-    print(f"Stored attendance for {name} (ID: {id}) at {current_time}")
-
-    with open(json_file_path_attendance, 'w') as file:
-        json.dump(attendance_data, file, indent=4)
+# In pipelined mode capture and inference run on background threads and
+# the Tk loop only paints the latest frame with the latest result
+pipeline = None
+if conf["pipelined"]:
+    pipeline = RecognitionPipeline(engine, vs, workers=conf["pipeline_workers"] or 1,
+                                   queue_size=conf["pipeline_queue_size"] or 1)
+last_frame_id = 0
+last_result_id = 0
 
 # Tkinter window setup
 root = tk.Tk()
@@ -75,75 +35,102 @@ canvas = tk.Canvas(root, width=640, height=480)
 canvas.pack()
 
 # Initialize variables
-prevPerson = None
-curPerson = None
-consecCount = 0
 video_running = False  # Flag to check if the video feed is running
 
+# Function to draw the engine results on to the frame
+def draw_result(frame, result):
+    for (top, right, bottom, left) in result.boxes:
+        cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
+
+    if len(result.recognitions) > 0:
+        cv2.putText(frame, "Status:Face Detecting", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+    # Optional overlay of the rolling FPS and per-stage p50/p95/p99
+    if conf["metrics_overlay"]:
+        for (i, line) in enumerate(engine.metrics.overlay_lines()):
+            cv2.putText(frame, line, (10, 40 + i * 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1)
+
+    return frame
+
 # Function to update the GUI with the video feed and attendance status
 def update_frame():
-    global prevPerson, curPerson, consecCount, video_running
+    global video_running
 
     if not video_running:
         return  # Stop updating frames if video is not running
 
-    ret, frame = vs.read()
+    with engine.metrics.stage("read"):
+        ret, frame = vs.read()
     if not ret:
         print("Failed to grab frame")
         return
 
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    gray_image = cv2.cvtColor(rgb, cv2.COLOR_BGR2GRAY)
-    gray_img = np.expand_dims(gray_image, axis=2).repeat(3, axis=2)
+    result = engine.process_frame(frame)
+    frame = draw_result(frame, result)
 
-    boxes = face_recognition.face_locations(gray_img, model=conf["detection_method"])
+    if result.status:
+        attendance_label.config(text=f"Attendance Status: {result.status}")
 
-    for (top, right, bottom, left) in boxes:
-        cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
+    show_frame(frame)
 
-    if len(boxes) > 0:
-        encodings = face_recognition.face_encodings(rgb, boxes)
-        preds = recognizer.predict_proba(encodings)[0]
-        j = np.argmax(preds)
-        curPerson = le.classes_[j]
+    # Repeat the frame update every 10 milliseconds
+    root.after(10, update_frame)
 
-        if prevPerson == curPerson:
-            consecCount += 1
-        else:
-            consecCount = 0
+# Function to paint the latest pipeline output without blocking on inference
+def render_pipeline():
+    global last_frame_id, last_result_id, video_running
 
-        prevPerson = curPerson
+    if not video_running:
+        return
 
-        name = studentTable.search(where(curPerson))[0][curPerson][0]
-        cv2.putText(frame, "Status:Face Detecting", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    if not pipeline.running():
+        print("Failed to grab frame")
+        return
 
-        attn_info = store_attendance(name, curPerson)
-        if attn_info:
-            attendance_label.config(text=f"Attendance Status: {attn_info}")
-        else:
-            attendance_label.config(text=f"Attendance Status: {name}")
+    frame_id, frame, result_id, result = pipeline.read()
 
-    # Convert the frame to an ImageTk object and update the canvas
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    img = Image.fromarray(frame_rgb)
-    img_tk = ImageTk.PhotoImage(image=img)
+    # Only repaint when the camera delivered a new frame
+    if frame is not None and frame_id != last_frame_id:
+        last_frame_id = frame_id
+        if result is not None:
+            frame = draw_result(frame.copy(), result)
+        show_frame(frame)
 
-    canvas.create_image(0, 0, anchor="nw", image=img_tk)
-    canvas.image = img_tk
+    if result is not None and result_id != last_result_id:
+        last_result_id = result_id
+        if result.status:
+            attendance_label.config(text=f"Attendance Status: {result.status}")
 
-    # Repeat the frame update every 10 milliseconds
-    root.after(10, update_frame)
+    root.after(10, render_pipeline)
+
+# Function to convert a frame to an ImageTk object and update the canvas
+def show_frame(frame):
+    with engine.metrics.stage("render"):
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        img = Image.fromarray(frame_rgb)
+        img_tk = ImageTk.PhotoImage(image=img)
+
+        canvas.create_image(0, 0, anchor="nw", image=img_tk)
+        canvas.image = img_tk
 
 # Start button function
 def start_video():
     global video_running
+    if video_running:
+        return
     video_running = True
-    update_frame()
+    if pipeline is not None:
+        pipeline.start()
+        render_pipeline()
+    else:
+        update_frame()
 
 # Exit button function
 def exit_program():
     global video_running
     video_running = False  # Stop the video feed
+    if pipeline is not None:
+        pipeline.stop()  # Stop the capture and inference threads
     vs.release()  # Release the video capture
     cv2.destroyAllWindows()  # Close all OpenCV windows
     root.quit()  # Exit the Tkinter main loop
@@ -161,4 +148,5 @@ root.mainloop()
 
 # Clean up after exiting the Tkinter window
 vs.release()
+engine.close()
 cv2.destroyAllWindows()
@@ -38,34 +38,38 @@
 
 
 
-import pickle
+from project.utils import Conf
+from project.encoding import open_encoding_store
+from project.models import publish_models, resolve_models
+import argparse
+
+# construct the argument parser and parse the arguments (see manage.py
+# delete for removing a person everywhere)
+ap = argparse.ArgumentParser()
+ap.add_argument("-i", "--id", required=True,
+    help="person ID whose encodings are deleted")
+args = vars(ap.parse_args())
 
 # Load the face encodings
 print("[INFO] loading face encodings...")
 
-# Load the existing encoding data
-with open("output/encodings.pickle", "rb") as f:
-    data = pickle.load(f)
-
-# Person ID to delete (for example, '03')
-person_id_to_delete = "03"
-
-# Check if person_id exists in the 'names' list
-if person_id_to_delete in data['names']:
-    # Get all the indexes where person_id_to_delete occurs in 'names'
-    indices_to_delete = [i for i, name in enumerate(data['names']) if name == person_id_to_delete]
-    
-    # Delete the corresponding entries from 'names' and 'encodings'
-    for index in reversed(indices_to_delete):  # We reverse to avoid index shifting during deletion
-        del data['names'][index]
-        del data['encodings'][index]
-    
+# Load the encoding store currently in use (the published model version,
+# or the flat output/ layout when nothing was published yet)
+conf = Conf("config/config.json")
+store = open_encoding_store(resolve_models(conf))
+
+# Person ID to delete
+person_id_to_delete = args["id"]
+
+if person_id_to_delete in store.names:
+    # Delete every row of the person with a single mask in a staging
+    # version and publish it, the recognizers pick it up from there
+    with publish_models(conf) as staged:
+        store = open_encoding_store(staged)
+        store.delete(person_id_to_delete)
+        store.save()
+
     print(f"[INFO] Deleted all occurrences of person ID {person_id_to_delete}")
-    
-    # Save the updated encoding data back to the pickle file
-    with open("output/encodings.pickle", "wb") as f:
-        pickle.dump(data, f)
-    
-    print("[INFO] Updated encodings.pickle successfully.")
+    print("[INFO] Updated encodings store successfully.")
 else:
     print(f"[ERROR] Person ID {person_id_to_delete} not found in the encodings data.")
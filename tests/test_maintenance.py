@@ -0,0 +1,57 @@
+# import the necessary packages
+import numpy as np
+import pytest
+import json
+import sys
+
+# the maintenance helpers import the face encoder
+pytest.importorskip("face_recognition")
+
+from project.utils import Conf
+from project.encoding import open_encoding_store
+from project.maintenance import delete_person
+from project.models import publish_models, resolve_models
+from project.storage import open_students
+
+def make_conf(tmp_path, backend):
+	# a configuration whose paths all live under `tmp_path`
+	conf = {
+		"dataset_path": str(tmp_path / "dataset"),
+		"class": "PROJECT",
+		"db_path": str(tmp_path / "enroll.json"),
+		"storage_backend": "sqlite",
+		"sqlite_path": str(tmp_path / "attendance.db"),
+		"encodings_path": str(tmp_path / "output" / "encodings"),
+		"recognizer_path": str(tmp_path / "output" / "recognizer.pickle"),
+		"le_path": str(tmp_path / "output" / "le.pickle"),
+		"model_dir": str(tmp_path / "output" / "models"),
+		"recognizer_backend": backend,
+		"attendance_log_dir": str(tmp_path / "attendance"),
+	}
+	confPath = tmp_path / "config.json"
+	confPath.write_text(json.dumps(conf))
+
+	return Conf(str(confPath))
+
+def test_delete_person_nn_backend_without_sklearn(tmp_path, monkeypatch):
+	# scikit-learn is not installed on an nn-only setup
+	for name in ("sklearn", "sklearn.preprocessing", "sklearn.svm"):
+		monkeypatch.setitem(sys.modules, name, None)
+
+	conf = make_conf(tmp_path, "nn")
+	students = open_students(conf)
+	students.add("01", "alice")
+	students.add("02", "bob")
+
+	with publish_models(conf) as staged:
+		store = open_encoding_store(staged)
+		store.append(np.random.rand(4, 128), ["01", "01", "02", "02"],
+			["a1.png", "a2.png", "b1.png", "b2.png"])
+		store.save()
+
+	result = delete_person(conf, "01", students=students)
+
+	assert result == {"attendance": 0, "encodings": 2, "trained": True}
+	assert "01" not in students
+	store = open_encoding_store(resolve_models(conf))
+	assert list(store.names) == ["02", "02"]
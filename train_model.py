@@ -1,53 +1,50 @@
 import tkinter as tk
 from tkinter import messagebox
 from project.utils import Conf
-from sklearn.preprocessing import LabelEncoder
-from sklearn.svm import SVC
-import pickle
+from project.encoding import open_encoding_store
+from project.recognition.training import train
+from project.models import publish_models
+from project.jobs import JobRunner
 
-def train_model():
-    try:
-        # Load the configuration
-        conf = Conf("config/config.json")
-        encodings_path = conf["encodings_path"]
-        recognizer_path = conf["recognizer_path"]
-        le_path = conf["le_path"]
+# Training runs off the Tk thread so the window keeps responding
+jobs = JobRunner()
 
+def train_job(conf, progress):
+    # Train into a staging version, the new model is only published once complete
+    with publish_models(conf) as staged:
         # Load the face encodings
-        print("[INFO] loading face encodings...")
-        with open(encodings_path, "rb") as f:
-            data = pickle.load(f)  # Use pickle.load instead of pickle.loads
-            
-        # Encode the labels
-        print("[INFO] encoding labels...")
-        le = LabelEncoder()
-        labels = le.fit_transform(data["names"])
+        progress("loading face encodings...")
+        store = open_encoding_store(staged)
 
-        # Train the model used to accept the 128-d encodings of the face
-        print("[INFO] training model...")
-        recognizer = SVC(C=1.0, kernel="linear", probability=True)
+        # Train the model of the configured recognizer backend and write it to disk
+        progress("training model...")
+        train(staged, store)
 
-        # Train the model using all encodings at once
-        recognizer.fit(data["encodings"], labels)
+        progress("publishing model...")
 
-        # Write the model to disk
-        print("[INFO] writing the model to disk...")
-        with open(recognizer_path, "wb") as f:
-            pickle.dump(recognizer, f)
+def train_model():
+    # Load the configuration and start the training job
+    conf = Conf("config/config.json")
+    train_button.config(state=tk.DISABLED)
+    poll_training(jobs.submit("train", train_job, conf))
 
-        # Write the label encoder to disk
-        with open(le_path, "wb") as f:
-            pickle.dump(le, f)
+def poll_training(job):
+    # Show the job progress until the training finished
+    status_label.config(text=job.message)
+    if not job.done():
+        root.after(200, poll_training, job)
+        return
 
-        # Show success message
-        messagebox.showinfo("Success", "Model training completed successfully!")
+    train_button.config(state=tk.NORMAL)
+    if job.error is not None:
+        messagebox.showerror("Error", f"An error occurred: {str(job.error)}")
+        return
 
-        # Automatically exit after training completion
-        exit_program()
+    # Show success message
+    messagebox.showinfo("Success", "Model training completed successfully!")
 
-    except Exception as e:
-        print(e)
-        messagebox.showerror("Error", f"An error occurred: {str(e)}")
+    # Automatically exit after training completion
+    exit_program()
 
 def exit_program():
     # Exit the program
@@ -80,5 +77,9 @@ title_label.pack(pady=10)
 train_button = tk.Button(root, text="Start Training", command=train_model, font=("Helvetica", 14), bg="#007BFF", fg="white")
 train_button.pack(pady=20)
 
+# Add Training Status
+status_label = tk.Label(root, text="", font=("Helvetica", 12), bg="#f4f4f9")
+status_label.pack()
+
 # Run Tkinter
 root.mainloop()